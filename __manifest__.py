@@ -54,6 +54,11 @@
     'assets': {
         'web.assets_backend': [
             'invoice_qr_scanner/static/src/js/clipboard_fix.js',
+            'invoice_qr_scanner/static/src/js/dashboard_loader.js',
+        ],
+        # Tableaux de bord : chargés à la demande (cf. dashboard_loader.js)
+        'invoice_qr_scanner.assets_dashboards': [
+            'invoice_qr_scanner/static/src/js/dashboard_common.js',
             'invoice_qr_scanner/static/src/js/invoice_scanner_dashboard_improved.js',
             'invoice_qr_scanner/static/src/xml/invoice_scanner_dashboard_improved.xml',
             'invoice_qr_scanner/static/src/css/invoice_scanner_dashboard_improved.css',
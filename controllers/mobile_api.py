@@ -19,23 +19,35 @@ Endpoints:
 - GET /api/v1/invoice-scanner/health - État de l'API
 """
 
+import gzip
 import logging
 import hashlib
+import re
 import secrets
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, wraps
 
 import psycopg2
 
 from odoo import http, _, fields
 from odoo.http import request, Response
-from odoo.exceptions import AccessError, AccessDenied
+from odoo.exceptions import AccessError, AccessDenied, UserError, ValidationError
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .scan_semaphore import (
     acquire_scan_slot, release_scan_slot,
     get_semaphore_status, SEMAPHORE_TIMEOUT,
 )
+from .token_cache import get_cached_token, cache_token, invalidate_token
+from ..models.response_cache import (
+    get_cached, set_cached, invalidate_company, get_cache_status,
+    HISTORY_CACHE_TTL, STATS_CACHE_TTL,
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -65,6 +77,37 @@ RL_OTP_VERIFY_IP = (60, 300, 300)
 RL_OTP_VERIFY_LOGIN = (10, 300, 300)
 
 
+# Plafond du comptage des erreurs (/errors) : au-delà, la pagination indique
+# `count_exceeded` plutôt que de compter toutes les lignes.
+ERRORS_COUNT_LIMIT = 10000
+
+# Classification des messages d'erreur (/errors), par ordre de priorité :
+# un message qui cite la DGI ET un timeout reste une erreur 'dgi_service'.
+# Une regex précompilée par catégorie : un seul parcours du message par
+# catégorie, sans générateur ni lower().
+ERROR_TYPE_PATTERNS = (
+    ('dgi_service', re.compile(r'dgi|fne', re.IGNORECASE)),
+    ('network', re.compile(r'timeout|connection|network|réseau|connexion', re.IGNORECASE)),
+    ('parsing', re.compile(r'parse|extract|format|uuid|url', re.IGNORECASE)),
+    ('invoice_creation', re.compile(r'facture|invoice|compte|journal|partner', re.IGNORECASE)),
+)
+
+
+@lru_cache(maxsize=4096)
+def _classify_error(error_message):
+    """Classifier le type d'erreur pour faciliter le filtrage.
+
+    Les messages d'erreur se répètent beaucoup (mêmes messages DGI/réseau
+    d'un scan à l'autre) : le résultat est mémorisé par message.
+    """
+    if not error_message:
+        return 'unknown'
+    for error_type, pattern in ERROR_TYPE_PATTERNS:
+        if pattern.search(error_message):
+            return error_type
+    return 'other'
+
+
 def _rate_limited(key, quota):
     """True si `key` a dépassé `quota` = (max_requests, window_s, block_s).
 
@@ -80,23 +123,70 @@ def _rate_limited(key, quota):
 
 # ==================== HELPERS ====================
 
+def _json_dumps(data):
+    """Sérialiser une réponse API (orjson si disponible, sinon json).
+
+    Les dates passent par `default=str` dans les deux cas
+    (OPT_PASSTHROUGH_DATETIME) : le format reste celui attendu par l'app
+    mobile, quel que soit le sérialiseur.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+def _request_timestamp():
+    """Horodatage ISO de la requête courante, calculé une seule fois.
+
+    Toutes les réponses (et erreurs) d'une même requête portent ainsi le
+    même `timestamp`.
+    """
+    ts = getattr(request, '_invoice_scanner_ts', None)
+    if ts is None:
+        ts = request._invoice_scanner_ts = datetime.now().isoformat()
+    return ts
+
+
+# Taille minimale (octets) d'un corps JSON compressé en gzip : en dessous,
+# l'en-tête gzip et le temps CPU ne sont pas rentabilisés.
+GZIP_MIN_SIZE = 1024
+
+
+def _json_response(payload, status):
+    """Construire la réponse HTTP JSON, compressée si le client l'accepte."""
+    body = _json_dumps(payload)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    # `Vary` sur TOUTES les réponses, compressées ou non : un cache placé
+    # devant Odoo doit distinguer les deux formes d'une même URL.
+    headers = {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Vary': 'Accept-Encoding',
+    }
+    # Qualité négociée et non simple sous-chaîne : `gzip;q=0` est un refus.
+    if (len(body) > GZIP_MIN_SIZE
+            and request.httprequest.accept_encodings['gzip'] > 0):
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, status=status, headers=headers)
+
+
 def api_response(data=None, message=None, success=True, status=200):
     """Générer une réponse API standardisée."""
     response_data = {
         'success': success,
         'api_version': API_VERSION,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': _request_timestamp(),
     }
     if message:
         response_data['message'] = message
     if data is not None:
         response_data['data'] = data
     
-    return Response(
-        json.dumps(response_data, default=str, ensure_ascii=False),
-        status=status,
-        headers={'Content-Type': 'application/json; charset=utf-8'}
-    )
+    return _json_response(response_data, status)
 
 
 def api_error(error_code, message, status=400, details=None, data=None):
@@ -108,18 +198,46 @@ def api_error(error_code, message, status=400, details=None, data=None):
             'message': message,
         },
         'api_version': API_VERSION,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': _request_timestamp(),
     }
     if details:
         response_data['error']['details'] = details
     if data is not None:
         response_data['data'] = data
     
-    return Response(
-        json.dumps(response_data, default=str, ensure_ascii=False),
-        status=status,
-        headers={'Content-Type': 'application/json; charset=utf-8'}
-    )
+    return _json_response(response_data, status)
+
+
+# Revalidation des endpoints interrogés en boucle par l'app (/stats, /errors) :
+# le client renvoie l'ETag reçu dans If-None-Match et obtient un 304 vide
+# tant que les données n'ont pas changé.
+ETAG_CACHE_CONTROL = 'private, max-age=10'
+
+
+def compute_etag(*parts):
+    """ETag fort calculé à partir de valeurs simples (repr stable)."""
+    return '"%s"' % hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified_response(etag):
+    """Réponse 304 si le client possède déjà cette version, sinon None.
+
+    Comparaison faible, comme l'exige If-None-Match : un proxy qui a
+    recompressé la réponse renvoie `W/"..."`, et `*` couvre toute version.
+    """
+    if not request.httprequest.if_none_match.contains_weak(etag.strip('"')):
+        return None
+    return Response(status=304, headers={
+        'ETag': etag,
+        'Cache-Control': ETAG_CACHE_CONTROL,
+    })
+
+
+def with_etag(response, etag):
+    """Ajouter l'ETag et la politique de cache à une réponse API."""
+    response.headers['ETag'] = etag
+    response.headers['Cache-Control'] = ETAG_CACHE_CONTROL
+    return response
 
 
 def safe_error_message(e, generic=None):
@@ -130,8 +248,7 @@ def safe_error_message(e, generic=None):
     (technique) est remplacée par un message générique pour ne pas
     divulguer de détails internes (le détail complet reste dans les logs).
     """
-    from odoo.exceptions import UserError as _UserError, ValidationError as _ValidationError
-    if isinstance(e, (_UserError, _ValidationError)):
+    if isinstance(e, (UserError, ValidationError)):
         return str(e)
     return generic or _("Une erreur interne s'est produite. Contactez l'administrateur.")
 
@@ -144,14 +261,62 @@ def get_client_ip():
 
 
 def get_json_body():
-    """Parser le corps JSON de la requête."""
+    """Parser le corps JSON de la requête.
+
+    Le résultat est mémorisé sur la requête : les appels suivants (helpers,
+    décorateurs) ne re-parsent pas le corps.
+    """
+    parsed = getattr(request, '_invoice_scanner_json_body', None)
+    if parsed is not None:
+        return parsed
     try:
-        data = request.httprequest.get_data(as_text=True)
-        if data:
-            return json.loads(data)
-        return {}
-    except json.JSONDecodeError:
-        return {}
+        data = request.httprequest.get_data(cache=True)
+        if not data:
+            parsed = {}
+        elif orjson is not None:
+            parsed = orjson.loads(data)
+        else:
+            parsed = json.loads(data)
+    except ValueError:
+        # json.JSONDecodeError et orjson.JSONDecodeError héritent de ValueError
+        parsed = {}
+    request._invoice_scanner_json_body = parsed
+    return parsed
+
+
+def get_request_params():
+    """Paramètres de la requête : corps JSON en POST, query string sinon.
+
+    La query string est renvoyée telle quelle (MultiDict de Werkzeug, dont
+    `.get()` donne la première valeur), sans copie dans un dict.
+    """
+    if request.httprequest.method == 'POST':
+        return get_json_body()
+    return request.httprequest.args
+
+
+# En-têtes de réponse au preflight CORS. Max-Age : le navigateur garde la
+# réponse un jour au lieu de refaire un OPTIONS avant chaque requête.
+CORS_PREFLIGHT_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Authorization, Content-Type',
+    'Access-Control-Max-Age': '86400',
+}
+
+
+def cors_preflight(func):
+    """Décorateur : répondre aux requêtes OPTIONS (preflight CORS).
+
+    À placer juste sous ``@http.route`` : le preflight est servi avant
+    ``require_auth`` (un preflight ne porte jamais de token).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if request.httprequest.method == 'OPTIONS':
+            return Response(status=200, headers=CORS_PREFLIGHT_HEADERS)
+        return func(*args, **kwargs)
+    return wrapper
 
 
 def api_exception_handler(func):
@@ -167,8 +332,16 @@ def api_exception_handler(func):
                 "Accès non autorisé",
                 status=403
             )
+        except (UserError, ValidationError) as e:
+            # Erreur métier attendue : une ligne suffit, pas de traceback
+            _logger.warning("Erreur métier API invoice-scanner: %s", e)
+            return api_error(
+                'INTERNAL_ERROR',
+                "Une erreur interne s'est produite",
+                status=500
+            )
         except Exception as e:
-            _logger.error(f"Erreur API invoice-scanner: {e}", exc_info=True)
+            _logger.error("Erreur API invoice-scanner: %s", e, exc_info=True)
             return api_error(
                 'INTERNAL_ERROR',
                 "Une erreur interne s'est produite",
@@ -222,6 +395,101 @@ def require_role(*group_xmlids):
     return decorator
 
 
+def _invalidate_read_cache():
+    """Invalider le cache /history et /stats de la société, après commit.
+
+    À appeler par les endpoints qui modifient des scans. Si la requête
+    échoue (rollback), le callback n'est pas exécuté.
+    """
+    dbname, company_id = request.env.cr.dbname, request.env.company.id
+    request.env.cr.postcommit.add(lambda: invalidate_company(dbname, company_id))
+
+
+# Libellés des sélections `state`, par champ. Clé = l'objet champ lui-même :
+# un rechargement du registre (installation d'un module qui étend la
+# sélection) crée de nouveaux champs, donc de nouvelles entrées.
+_STATE_LABELS = {}
+
+
+def _state_labels(records):
+    """Dict {valeur: libellé} de la sélection `state` du modèle de `records`."""
+    field = records._fields['state']
+    labels = _STATE_LABELS.get(field)
+    if labels is None:
+        labels = _STATE_LABELS[field] = dict(field.selection)
+    return labels
+
+
+def _state_label(record):
+    """Libellé de `record.state`, sans reconstruire le dict à chaque appel."""
+    return _state_labels(record).get(record.state, '')
+
+
+# Champs lus par `_format_invoice`
+INVOICE_API_FIELDS = [
+    'name', 'ref', 'partner_id', 'invoice_date', 'amount_total',
+    'amount_residual', 'currency_id', 'state', 'is_from_qr_scan', 'qr_scan_uuid',
+]
+
+# Champs lus par `_format_scan_records` (un seul `read()` par page)
+SCAN_API_FIELDS = [
+    'reference', 'qr_uuid', 'supplier_name', 'supplier_code_dgi',
+    'invoice_number_dgi', 'invoice_date', 'amount_ttc', 'currency_id',
+    'state', 'processed_by', 'processed_date', 'invoice_id', 'scan_date',
+    'scanned_by', 'error_message', 'duplicate_count',
+    'last_duplicate_attempt', 'last_duplicate_user_id',
+    'reprocess_attempt_count', 'last_reprocess_attempt',
+    'last_reprocess_user_id', 'verification_duration', 'is_manual_entry',
+]
+
+# Clés des lignes de /errors -> champ lu en base. Le paramètre `fields` de
+# l'endpoint restreint à la fois la réponse et le SELECT.
+ERROR_API_FIELDS = {
+    'id': 'id',
+    'reference': 'reference',
+    'qr_uuid': 'qr_uuid',
+    'qr_url': 'qr_url',
+    'supplier_name': 'supplier_name',
+    'invoice_number_dgi': 'invoice_number_dgi',
+    'amount_ttc': 'amount_ttc',
+    'error_message': 'error_message',
+    'error_type': 'error_message',
+    'scan_date': 'scan_date',
+    'scanned_by': 'scanned_by',
+    'scanned_by_id': 'scanned_by',
+    'can_retry': 'invoice_id',
+    'retry_count': 'duplicate_count',
+}
+
+
+# Séparateurs de milliers acceptés dans un montant texte ("1 677 566") :
+# espace, espace insécable et espace fine insécable (format fr-FR).
+_AMOUNT_SEPARATORS = str.maketrans('', '', ' \u00a0\u202f\t')
+
+
+def parse_amount(value):
+    """Convertir un montant reçu du client (nombre JSON ou texte) en float.
+
+    Lève ValueError/TypeError si la valeur n'est pas un montant.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float(str(value).translate(_AMOUNT_SEPARATORS))
+
+
+def parse_invoice_date(value):
+    """Convertir une date de facture (JJ/MM/AAAA ou AAAA-MM-JJ) en date, ou None.
+
+    Le format est choisi d'après le séparateur : un seul `strptime`, au lieu
+    d'essayer chaque format tour à tour jusqu'au premier qui passe.
+    """
+    fmt = '%d/%m/%Y' if '/' in value else '%Y-%m-%d'
+    try:
+        return datetime.strptime(value, fmt).date()
+    except ValueError:
+        return None
+
+
 def validate_date_param(value):
     """Valide une date de filtre (YYYY-MM-DD). Retourne la chaîne validée ou None."""
     if not value:
@@ -252,22 +520,32 @@ class InvoiceScannerMobileAPI(http.Controller):
         """Vérifier un token API et retourner l'utilisateur associé."""
         try:
             token_hash = self._hash_token(token)
+            now = fields.Datetime.now()
+            
+            cached_user_id = get_cached_token(request.db, token_hash, now)
+            if cached_user_id:
+                # Un utilisateur archivé perd l'accès sans attendre le TTL : la
+                # recherche en base filtre sur `user_id.active`, le cache aussi.
+                user = request.env['res.users'].sudo().browse(cached_user_id)
+                if user.active:
+                    return user
+                invalidate_token(request.db, token_hash)
             
             ApiToken = request.env['invoice.scanner.api.token'].sudo()
             token_record = ApiToken.search([
                 ('token_hash', '=', token_hash),
-                ('expires_at', '>', fields.Datetime.now()),
-                ('is_active', '=', True)
+                ('expires_at', '>', now),
+                ('is_active', '=', True),
+                ('user_id.active', '=', True),
             ], limit=1)
             
-            if token_record and token_record.user_id.active:
+            if token_record:
                 # Throttle `last_used` writes : inutile de toucher la ligne
                 # \u00e0 chaque requ\u00eate (cr\u00e9e des conflits "could not serialize
                 # access due to concurrent update" quand plusieurs requ\u00eates
                 # mobiles partagent le m\u00eame token). On \u00e9crit au max une fois
                 # par minute, et on isole l'\u00e9criture dans un savepoint pour
                 # qu'une collision ne corrompe pas la transaction principale.
-                now = fields.Datetime.now()
                 last_used = token_record.last_used
                 if not last_used or (now - last_used).total_seconds() >= 60:
                     try:
@@ -283,6 +561,7 @@ class InvoiceScannerMobileAPI(http.Controller):
                     except Exception as e:
                         _logger.warning("Erreur MAJ last_used token %s: %s",
                                         token_record.id, e)
+                cache_token(request.db, token_hash, token_record.user_id.id, token_record.expires_at)
                 return token_record.user_id
             
             return False
@@ -290,84 +569,144 @@ class InvoiceScannerMobileAPI(http.Controller):
             _logger.error(f"Erreur vérification token: {e}")
             return False
 
-    def _get_scan_ot_links(self, record):
-        """Retourne la liste des OT (Ordres de Transit) liés à un scan.
+    def _get_scan_ot_links_batch(self, records):
+        """Retourne les OT (Ordres de Transit) liés à des scans, en une recherche.
 
         Le lien est porté par `potting.cost.line.scan_record_id` (module
         `potting_management`). Ce module étant OPTIONNEL du point de vue de
         `invoice_qr_scanner`, on effectue une recherche SOUPLE : si le modèle
-        n'est pas présent dans le registre, on renvoie une liste vide sans
+        n'est pas présent dans le registre, on renvoie un dict vide sans
         jamais casser l'endpoint.
+
+        Retourne un dict {scan_id: [liens]} ; les scans sans OT sont absents.
         """
         env = request.env
-        if 'potting.cost.line' not in env:
-            return []
+        if not records or 'potting.cost.line' not in env:
+            return {}
         try:
             lines = env['potting.cost.line'].sudo().search(
-                [('scan_record_id', '=', record.id)],
+                [('scan_record_id', 'in', records.ids)],
                 order='date desc, id desc',
             )
         except Exception as e:  # pragma: no cover - robustesse défensive
-            _logger.warning("Lecture des OT liés au scan %s impossible: %s",
-                            record.id, e)
-            return []
-        links = []
+            _logger.warning("Lecture des OT liés aux scans %s impossible: %s",
+                            records.ids, e)
+            return {}
+        links = {}
         for line in lines:
-            ot = line.transit_order_id
-            links.append({
-                'cost_line_id': line.id,
-                'ot_id': ot.id if ot else None,
-                'ot_reference': (ot.ot_reference or ot.name or '') if ot else '',
-                'cost_type': line.cost_type_id.name or '',
-                'cost_type_code': line.cost_type_id.code or '',
-                'amount': line.amount or 0.0,
-                'currency': line.currency_id.name if line.currency_id else 'XOF',
-                'state': line.state,
-                'state_label': dict(line._fields['state'].selection).get(line.state, ''),
-            })
+            links.setdefault(line.scan_record_id.id, []).append(self._format_ot_link(line))
         return links
 
-    def _format_scan_record(self, record):
-        """Formater un enregistrement de scan pour l'API."""
+    def _format_ot_link(self, line):
+        """Formater une ligne de coût OT (`potting.cost.line`) pour l'API."""
+        ot = line.transit_order_id
         return {
-            'id': record.id,
-            'reference': record.reference,
-            'qr_uuid': record.qr_uuid,
-            'supplier_name': record.supplier_name or '',
-            'supplier_code_dgi': record.supplier_code_dgi or '',
-            'invoice_number_dgi': record.invoice_number_dgi or '',
-            'invoice_date': record.invoice_date.isoformat() if record.invoice_date else None,
-            'amount_ttc': record.amount_ttc,
-            'currency': record.currency_id.name if record.currency_id else 'XOF',
-            'state': record.state,
-            'state_label': dict(record._fields['state'].selection).get(record.state, ''),
-            'is_processed': record.state == 'processed',
-            'processed_by': record.processed_by.name if record.processed_by else None,
-            'processed_by_id': record.processed_by.id if record.processed_by else None,
-            'processed_date': record.processed_date.isoformat() if record.processed_date else None,
-            'invoice_id': record.invoice_id.id if record.invoice_id else None,
-            'invoice_name': record.invoice_id.name if record.invoice_id else None,
-            'invoice_state': record.invoice_id.state if record.invoice_id else None,
-            'scan_date': record.scan_date.isoformat() if record.scan_date else None,
-            'scanned_by': record.scanned_by.name if record.scanned_by else '',
-            'error_message': record.error_message or '',
-            # Champs pour le suivi des doublons
-            'duplicate_count': record.duplicate_count,
-            'last_duplicate_attempt': record.last_duplicate_attempt.isoformat() if record.last_duplicate_attempt else None,
-            'last_duplicate_user': record.last_duplicate_user_id.name if record.last_duplicate_user_id else '',
-            # Champs pour le suivi des tentatives de retraitement
-            'reprocess_attempt_count': record.reprocess_attempt_count,
-            'last_reprocess_attempt': record.last_reprocess_attempt.isoformat() if record.last_reprocess_attempt else None,
-            'last_reprocess_user': record.last_reprocess_user_id.name if record.last_reprocess_user_id else '',
-            # Durée de vérification et saisie manuelle
-            'verification_duration': record.verification_duration or 0,
-            'is_manual_entry': record.is_manual_entry or False,
-            # Liens vers les Ordres de Transit (OT) — module potting_management
-            'ot_links': self._get_scan_ot_links(record),
+            'cost_line_id': line.id,
+            'ot_id': ot.id if ot else None,
+            'ot_reference': (ot.ot_reference or ot.name or '') if ot else '',
+            'cost_type': line.cost_type_id.name or '',
+            'cost_type_code': line.cost_type_id.code or '',
+            'amount': line.amount or 0.0,
+            'currency': line.currency_id.name if line.currency_id else 'XOF',
+            'state': line.state,
+            'state_label': _state_label(line),
         }
 
+    def _search_company_scan(self, record_id, expected_state):
+        """Retrouver un scan de la société courante, en vue d'une transition.
+
+        Cas nominal (scan dans l'état attendu) : une seule requête, qui
+        vérifie à la fois existence, société et état. Sinon une seconde
+        recherche distingue « introuvable » (recordset vide) de « mauvais
+        état » (scan renvoyé, à l'appelant de rejeter son état).
+        """
+        ScanRecord = request.env['invoice.scan.record'].sudo()
+        domain = [('id', '=', record_id), ('company_id', '=', request.env.company.id)]
+        record = ScanRecord.search(domain + [('state', '=', expected_state)], limit=1)
+        if not record:
+            record = ScanRecord.search(domain, limit=1)
+        return record
+
+    def _format_scan_records(self, records):
+        """Formater une liste de scans pour l'API (historique, listes Traiteur).
+
+        Lecture en lot via `read(load=None)` : une requête pour les champs
+        du scan, une par modèle lié pour les noms (utilisateurs, devises,
+        factures) et une seule recherche pour les OT liés. Les lignes sont
+        ensuite mises en forme à partir des dicts, sans repasser par les
+        descripteurs de l'ORM.
+        """
+        if not records:
+            return []
+        rows = records.read(SCAN_API_FIELDS, load=None)
+        env = records.env
+        user_ids = {
+            row[fname] for row in rows
+            for fname in ('processed_by', 'scanned_by',
+                          'last_duplicate_user_id', 'last_reprocess_user_id')
+            if row[fname]
+        }
+        user_names = {u['id']: u['name'] for u in env['res.users'].browse(user_ids).read(['name'])}
+        currency_ids = {row['currency_id'] for row in rows if row['currency_id']}
+        currency_names = {c['id']: c['name'] for c in env['res.currency'].browse(currency_ids).read(['name'])}
+        invoice_ids = {row['invoice_id'] for row in rows if row['invoice_id']}
+        invoices = {i['id']: i for i in env['account.move'].browse(invoice_ids).read(['name', 'state'])}
+        ot_links = self._get_scan_ot_links_batch(records)
+        state_labels = _state_labels(records)
+
+        def iso(value):
+            return value.isoformat() if value else None
+
+        result = []
+        for row in rows:
+            invoice = invoices.get(row['invoice_id']) or {}
+            result.append({
+                'id': row['id'],
+                'reference': row['reference'],
+                'qr_uuid': row['qr_uuid'],
+                'supplier_name': row['supplier_name'] or '',
+                'supplier_code_dgi': row['supplier_code_dgi'] or '',
+                'invoice_number_dgi': row['invoice_number_dgi'] or '',
+                'invoice_date': iso(row['invoice_date']),
+                'amount_ttc': row['amount_ttc'],
+                'currency': currency_names.get(row['currency_id'], 'XOF'),
+                'state': row['state'],
+                'state_label': state_labels.get(row['state'], ''),
+                'is_processed': row['state'] == 'processed',
+                'processed_by': user_names.get(row['processed_by']),
+                'processed_by_id': row['processed_by'] or None,
+                'processed_date': iso(row['processed_date']),
+                'invoice_id': row['invoice_id'] or None,
+                'invoice_name': invoice.get('name'),
+                'invoice_state': invoice.get('state'),
+                'scan_date': iso(row['scan_date']),
+                'scanned_by': user_names.get(row['scanned_by'], ''),
+                'error_message': row['error_message'] or '',
+                # Champs pour le suivi des doublons
+                'duplicate_count': row['duplicate_count'],
+                'last_duplicate_attempt': iso(row['last_duplicate_attempt']),
+                'last_duplicate_user': user_names.get(row['last_duplicate_user_id'], ''),
+                # Champs pour le suivi des tentatives de retraitement
+                'reprocess_attempt_count': row['reprocess_attempt_count'],
+                'last_reprocess_attempt': iso(row['last_reprocess_attempt']),
+                'last_reprocess_user': user_names.get(row['last_reprocess_user_id'], ''),
+                # Durée de vérification et saisie manuelle
+                'verification_duration': row['verification_duration'] or 0,
+                'is_manual_entry': row['is_manual_entry'] or False,
+                # Liens vers les Ordres de Transit (OT) — module potting_management
+                'ot_links': ot_links.get(row['id'], []),
+            })
+        return result
+
+    def _format_scan_record(self, record):
+        """Formater un enregistrement de scan pour l'API."""
+        return self._format_scan_records(record)[0]
+
     def _format_invoice(self, invoice):
         """Formater une facture pour l'API."""
+        # Ne charger que les colonnes utiles : `account_move` en compte
+        # des dizaines, que l'accès par attribut rapatrierait toutes.
+        invoice.fetch(INVOICE_API_FIELDS)
         return {
             'id': invoice.id,
             'name': invoice.name,
@@ -379,7 +718,7 @@ class InvoiceScannerMobileAPI(http.Controller):
             'amount_residual': invoice.amount_residual,
             'currency': invoice.currency_id.name,
             'state': invoice.state,
-            'state_label': dict(invoice._fields['state'].selection).get(invoice.state, ''),
+            'state_label': _state_label(invoice),
             'is_from_qr_scan': invoice.is_from_qr_scan,
             'qr_scan_uuid': invoice.qr_scan_uuid or '',
         }
@@ -451,6 +790,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/auth/request-otp', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     def request_otp(self, **kw):
         """Envoyer un code de connexion à usage unique par email.
@@ -466,9 +806,6 @@ class InvoiceScannerMobileAPI(http.Controller):
         Un compte inconnu, désactivé, sans droit sur le module ou sans email
         reçoit donc le même « code envoyé » — sans qu'aucun email ne parte.
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-
         data = get_json_body()
         login = (data.get('login') or '').strip()
 
@@ -531,6 +868,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/auth/verify-otp', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     def verify_otp(self, **kw):
         """Échanger un code de connexion contre un token d'API.
@@ -546,9 +884,6 @@ class InvoiceScannerMobileAPI(http.Controller):
         Contrairement à `request_otp`, un échec est explicite : à ce stade
         l'appelant détient déjà un code, l'énumération n'est plus l'enjeu.
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-
         data = get_json_body()
         login = (data.get('login') or '').strip()
         code = (data.get('otp') or '').strip()
@@ -624,21 +959,29 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/auth/logout', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     def logout(self, **kw):
         """Déconnecter l'utilisateur en désactivant son token."""
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         auth_header = request.httprequest.headers.get('Authorization', '')
         
         if auth_header.startswith('Bearer '):
             token = auth_header[7:]
             token_hash = self._hash_token(token)
+            invalidate_token(request.db, token_hash)
             
-            request.env['invoice.scanner.api.token'].sudo().search([
-                ('token_hash', '=', token_hash)
-            ]).write({'is_active': False})
+            # UPDATE direct : pas de SELECT préalable pour une simple
+            # désactivation (aucun champ calculé ni suivi ne dépend de
+            # `is_active`). Le cache ORM du modèle est invalidé ensuite.
+            ApiToken = request.env['invoice.scanner.api.token'].sudo()
+            ApiToken.flush_model(['is_active'])
+            request.env.cr.execute(
+                "UPDATE invoice_scanner_api_token SET is_active = false, "
+                "write_date = (now() at time zone 'UTC'), write_uid = %s "
+                "WHERE token_hash = %s AND is_active",
+                (request.env.uid or None, token_hash),
+            )
+            ApiToken.invalidate_model(['is_active', 'write_date', 'write_uid'])
         
         return api_response(message='Déconnexion réussie')
 
@@ -646,6 +989,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/scan-with-data', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def scan_with_data(self, user=None, **kw):
@@ -672,8 +1016,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - scan_record: Enregistrement du scan
         - invoice: Facture créée
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         qr_url = data.get('qr_url', '').strip()
@@ -697,22 +1040,15 @@ class InvoiceScannerMobileAPI(http.Controller):
             return api_error('VALIDATION_ERROR', 'Le montant TTC est requis', status=400)
         
         try:
-            amount_ttc = float(str(amount_ttc).replace(' ', '').replace('\u00a0', ''))
+            amount_ttc = parse_amount(amount_ttc)
             if amount_ttc < 0:
                 return api_error('VALIDATION_ERROR', 'Le montant TTC doit être positif', status=400)
         except (ValueError, TypeError):
             return api_error('VALIDATION_ERROR', 'Montant TTC invalide', status=400)
         
         # Parser la date
-        invoice_date = None
         date_str = data.get('invoice_date', '').strip()
-        if date_str:
-            for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
-                try:
-                    invoice_date = datetime.strptime(date_str, fmt).date()
-                    break
-                except ValueError:
-                    continue
+        invoice_date = parse_invoice_date(date_str) if date_str else None
         
         # Extraire l'UUID
         ScanRecord = request.env['invoice.scan.record'].sudo()
@@ -733,9 +1069,9 @@ class InvoiceScannerMobileAPI(http.Controller):
                 'last_duplicate_attempt': fields.Datetime.now(),
                 'last_duplicate_user_id': user.id,
             })
-            existing.message_post(
+            existing._message_log(
                 body=f"Tentative de scan doublon #{existing.duplicate_count} par {user.name} (scan-with-data)",
-                message_type='notification'
+                message_type='notification',
             )
             return api_error(
                 'DUPLICATE',
@@ -841,6 +1177,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/check', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def check_qr_code(self, user=None, **kw):
@@ -853,9 +1190,6 @@ class InvoiceScannerMobileAPI(http.Controller):
         - exists: Boolean
         - scan_record: Enregistrement existant si présent
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         data = get_json_body()
         qr_url = data.get('qr_url', '').strip()
         
@@ -883,6 +1217,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/report-duplicate', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def report_duplicate(self, user=None, **kw):
@@ -898,8 +1233,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - success: Boolean
         - record: Enregistrement mis à jour avec le nouveau compteur
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         qr_url = data.get('qr_url', '').strip()
@@ -926,9 +1260,9 @@ class InvoiceScannerMobileAPI(http.Controller):
         })
         
         # Log pour traçabilité
-        existing.message_post(
+        existing._message_log(
             body=f"Tentative de scan doublon #{existing.duplicate_count} signalée par {user.name} (depuis le cache local)",
-            message_type='notification'
+            message_type='notification',
         )
         
         return api_response({
@@ -943,7 +1277,7 @@ class InvoiceScannerMobileAPI(http.Controller):
                 'invoice_number_dgi': existing.invoice_number_dgi or '',
                 'amount_ttc': existing.amount_ttc or 0,
                 'state': existing.state,
-                'state_label': dict(existing._fields['state'].selection).get(existing.state, ''),
+                'state_label': _state_label(existing),
                 'invoice_id': existing.invoice_id.id if existing.invoice_id else None,
                 'invoice_name': existing.invoice_id.name if existing.invoice_id else None,
                 'scan_date': existing.scan_date.isoformat() if existing.scan_date else None,
@@ -958,6 +1292,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/scan-to-process', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
@@ -971,8 +1306,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - record: Enregistrement trouvé avec ses détails
         - already_processed: Si la facture est déjà traitée
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         qr_url = data.get('qr_url', '').strip()
@@ -1043,6 +1377,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/traiteur/pending', type='http', auth='none',
                 methods=['GET', 'POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
@@ -1057,13 +1392,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - records: Liste des scans en attente de traitement
         - pagination: Informations de pagination
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
-        if request.httprequest.method == 'POST':
-            data = get_json_body()
-        else:
-            data = dict(request.httprequest.args)
+        data = get_request_params()
         
         try:
             page = max(1, int(data.get('page', 1)))
@@ -1084,7 +1413,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         records = ScanRecord.search(domain, limit=limit, offset=offset, order='scan_date desc')
         
         return api_response({
-            'records': [self._format_scan_record(r) for r in records],
+            'records': self._format_scan_records(records),
             'pagination': {
                 'page': page,
                 'limit': limit,
@@ -1097,14 +1426,12 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/traiteur/stats', type='http', auth='none',
                 methods=['GET', 'POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
     def get_traiteur_stats(self, user=None, **kw):
         """Obtenir les statistiques du profil Traiteur."""
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         ScanRecord = request.env['invoice.scan.record'].sudo()
         company_id = request.env.company.id
         
@@ -1145,6 +1472,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/mark-processed/<int:record_id>', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
@@ -1155,19 +1483,14 @@ class InvoiceScannerMobileAPI(http.Controller):
         - success: Boolean
         - record: Enregistrement mis à jour
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
-        ScanRecord = request.env['invoice.scan.record'].sudo()
-        record = ScanRecord.browse(record_id)
+        record = self._search_company_scan(record_id, 'done')
         
-        if not record.exists():
+        if not record:
             return api_error('NOT_FOUND', 'Enregistrement non trouvé', status=404)
         
-        if record.company_id.id != request.env.company.id:
-            return api_error('NOT_FOUND', 'Enregistrement non trouvé', status=404)
-        
-        if record.state not in ('done',):
+        if record.state != 'done':
             return api_error(
                 'INVALID_STATE',
                 f"Seuls les scans avec facture créée peuvent être marqués comme traités (état actuel: {record.state})",
@@ -1193,6 +1516,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/mark-unprocessed/<int:record_id>', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
@@ -1203,16 +1527,11 @@ class InvoiceScannerMobileAPI(http.Controller):
         - success: Boolean
         - record: Enregistrement mis à jour
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
-        ScanRecord = request.env['invoice.scan.record'].sudo()
-        record = ScanRecord.browse(record_id)
+        record = self._search_company_scan(record_id, 'processed')
         
-        if not record.exists():
-            return api_error('NOT_FOUND', 'Enregistrement non trouvé', status=404)
-        
-        if record.company_id.id != request.env.company.id:
+        if not record:
             return api_error('NOT_FOUND', 'Enregistrement non trouvé', status=404)
         
         if record.state != 'processed':
@@ -1241,6 +1560,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/bulk-mark-processed', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     @require_role('invoice_qr_scanner.group_invoice_scanner_traiteur')
@@ -1250,13 +1570,13 @@ class InvoiceScannerMobileAPI(http.Controller):
         Body JSON:
         - record_ids: Liste des IDs à marquer (optionnel, sinon tous les 'done' éligibles)
         - max_records: Nombre maximum à traiter (défaut: 50, max: 200)
+        - verbose: false pour ne renvoyer que le résumé (défaut: true)
         
         Returns:
-        - results: Résultat pour chaque enregistrement
+        - results: Résultat pour chaque enregistrement (si verbose)
         - summary: Résumé des résultats
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         record_ids = data.get('record_ids', [])
@@ -1264,6 +1584,7 @@ class InvoiceScannerMobileAPI(http.Controller):
             max_records = min(200, max(1, int(data.get('max_records', 50))))
         except (ValueError, TypeError):
             max_records = 50
+        verbose = data.get('verbose', True) is not False
         
         ScanRecord = request.env['invoice.scan.record'].sudo()
         
@@ -1279,19 +1600,43 @@ class InvoiceScannerMobileAPI(http.Controller):
         records = ScanRecord.search(domain, limit=max_records, order='scan_date asc')
         
         results = []
+        successful = failed = 0
         now = fields.Datetime.now()
+        vals = {
+            'state': 'processed',
+            'processed_by': user.id,
+            'processed_date': now,
+        }
+        body = f"Scan marqué comme traité par {user.name} (marquage en masse depuis l'application mobile)"
+        
+        # Chemin rapide : une seule écriture et un seul lot de messages pour
+        # tout le recordset. En cas d'échec, on rejoue ligne par ligne pour
+        # isoler les enregistrements fautifs. Les deux chemins journalisent
+        # une note (`_message_log*`) : le chatter ne dépend pas du chemin pris.
+        try:
+            with request.env.cr.savepoint():
+                records.write(vals)
+                records._message_log_batch(
+                    bodies={record.id: body for record in records},
+                    message_type='notification',
+                )
+            successful = len(records)
+            if verbose:
+                results = [{
+                    'record_id': record.id,
+                    'reference': record.reference,
+                    'success': True,
+                } for record in records]
+            records = ScanRecord.browse()
+        except Exception as e:
+            _logger.warning("Marquage en masse groupé impossible, repli ligne par ligne: %s", e)
         
         for record in records:
             try:
-                record.write({
-                    'state': 'processed',
-                    'processed_by': user.id,
-                    'processed_date': now,
-                })
-                record.message_post(
-                    body=f"Scan marqué comme traité par {user.name} (marquage en masse depuis l'application mobile)",
-                    message_type='notification'
-                )
+                with request.env.cr.savepoint():
+                    record.write(vals)
+                    record._message_log(body=body, message_type='notification')
+                successful += 1
                 results.append({
                     'record_id': record.id,
                     'reference': record.reference,
@@ -1299,6 +1644,7 @@ class InvoiceScannerMobileAPI(http.Controller):
                 })
             except Exception as e:
                 _logger.error(f"Erreur marquage traité record {record.id}: {e}")
+                failed += 1
                 results.append({
                     'record_id': record.id,
                     'reference': record.reference,
@@ -1306,21 +1652,22 @@ class InvoiceScannerMobileAPI(http.Controller):
                     'error': safe_error_message(e),
                 })
         
-        successful = sum(1 for r in results if r.get('success'))
-        
-        return api_response({
-            'results': results,
+        response = {
             'summary': {
-                'total_processed': len(results),
+                'total_processed': successful + failed,
                 'successful': successful,
-                'failed': len(results) - successful,
+                'failed': failed,
             }
-        })
+        }
+        if verbose:
+            response['results'] = results
+        return api_response(response)
 
     # ==================== ENDPOINTS HISTORIQUE ====================
 
     @http.route('/api/v1/invoice-scanner/history', type='http', auth='none',
                 methods=['GET', 'POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def get_history(self, user=None, **kw):
@@ -1335,14 +1682,8 @@ class InvoiceScannerMobileAPI(http.Controller):
         - records: Liste des scans
         - pagination: Informations de pagination
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         # Accepter les paramètres en GET ou POST
-        if request.httprequest.method == 'POST':
-            data = get_json_body()
-        else:
-            data = dict(request.httprequest.args)
+        data = get_request_params()
         
         try:
             page = max(1, int(data.get('page', 1)))
@@ -1350,26 +1691,37 @@ class InvoiceScannerMobileAPI(http.Controller):
         except (ValueError, TypeError):
             page, limit = 1, 20
         state = data.get('state')
+        # Valider la valeur du state
+        valid_states = ('draft', 'done', 'processed', 'error')
+        if state not in valid_states:
+            state = None
+        
+        dbname, company_id = request.env.cr.dbname, request.env.company.id
+        cache_key = (user.id, page, limit, state)
+        cached = get_cached(dbname, 'history', company_id, cache_key)
+        if cached is not None:
+            return api_response(cached)
         
         ScanRecord = request.env['invoice.scan.record'].sudo()
         
         # Construire le domaine
-        domain = [('company_id', '=', request.env.company.id)]
+        domain = [('company_id', '=', company_id)]
         if state:
-            # Valider la valeur du state
-            valid_states = ('draft', 'done', 'processed', 'error')
-            if state in valid_states:
-                domain.append(('state', '=', state))
-        
-        # Comptage total
-        total_count = ScanRecord.search_count(domain)
+            domain.append(('state', '=', state))
         
         # Récupérer les enregistrements
         offset = (page - 1) * limit
         records = ScanRecord.search(domain, limit=limit, offset=offset, order='create_date desc')
         
-        return api_response({
-            'records': [self._format_scan_record(r) for r in records],
+        # Comptage total : une page incomplète est la dernière, le total s'en
+        # déduit sans second COUNT (sauf page vide au-delà de la fin)
+        if len(records) < limit and (records or not offset):
+            total_count = offset + len(records)
+        else:
+            total_count = ScanRecord.search_count(domain)
+        
+        result = {
+            'records': self._format_scan_records(records),
             'pagination': {
                 'page': page,
                 'limit': limit,
@@ -1378,10 +1730,13 @@ class InvoiceScannerMobileAPI(http.Controller):
                 'has_next': offset + limit < total_count,
                 'has_previous': page > 1,
             }
-        })
+        }
+        set_cached(dbname, 'history', company_id, cache_key, result, HISTORY_CACHE_TTL)
+        return api_response(result)
 
     @http.route('/api/v1/invoice-scanner/invoice/<int:invoice_id>', type='http', auth='none',
                 methods=['GET', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def get_invoice_details(self, invoice_id, user=None, **kw):
@@ -1390,15 +1745,13 @@ class InvoiceScannerMobileAPI(http.Controller):
         Returns:
         - invoice: Détails de la facture
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
-        invoice = request.env['account.move'].sudo().browse(invoice_id)
-        
-        if not invoice.exists():
-            return api_error('NOT_FOUND', 'Facture non trouvée', status=404)
+        # Existence et société vérifiées par la même requête
+        invoice = request.env['account.move'].sudo().search([
+            ('id', '=', invoice_id),
+            ('company_id', '=', request.env.company.id),
+        ], limit=1)
         
-        if invoice.company_id.id != request.env.company.id:
+        if not invoice:
             return api_error('NOT_FOUND', 'Facture non trouvée', status=404)
         
         return api_response(self._format_invoice(invoice))
@@ -1407,99 +1760,87 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/health', type='http', auth='none',
                 methods=['GET', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     def health_check(self, **kw):
         """Vérifier l'état de l'API."""
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         return api_response({
             'status': 'healthy',
             'api_version': API_VERSION,
             'module': 'invoice_qr_scanner',
             'semaphore': get_semaphore_status(),
+            'response_cache': get_cache_status(),
         })
 
     @http.route('/api/v1/invoice-scanner/stats', type='http', auth='none',
                 methods=['GET', 'POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def get_stats(self, user=None, **kw):
         """Obtenir les statistiques de scan."""
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
-        ScanRecord = request.env['invoice.scan.record'].sudo()
-        company_id = request.env.company.id
+        dbname, company_id = request.env.cr.dbname, request.env.company.id
+        cached = get_cached(dbname, 'stats', company_id, user.id)
+        if cached is not None:
+            return self._stats_response(cached)
         
-        # Statistiques des enregistrements
-        successful_scans = ScanRecord.search_count([
-            ('company_id', '=', company_id),
-            ('state', 'in', ['done', 'processed'])
-        ])
-        processed_scans = ScanRecord.search_count([
-            ('company_id', '=', company_id),
-            ('state', '=', 'processed')
-        ])
-        unprocessed_scans = ScanRecord.search_count([
-            ('company_id', '=', company_id),
-            ('state', '=', 'done')
-        ])
-        error_scans = ScanRecord.search_count([
-            ('company_id', '=', company_id),
-            ('state', '=', 'error')
-        ])
+        ScanRecord = request.env['invoice.scan.record'].sudo()
         
-        # Comptage total des tentatives de doublons (somme des duplicate_count)
-        records_with_duplicates = ScanRecord.search([
-            ('company_id', '=', company_id),
-            ('duplicate_count', '>', 0)
+        # Toutes les statistiques en une seule passe SQL (COUNT/SUM ... FILTER)
+        ScanRecord.flush_model([
+            'company_id', 'state', 'duplicate_count', 'amount_ttc',
+            'verification_duration', 'is_manual_entry',
         ])
-        total_duplicate_attempts = sum(r.duplicate_count for r in records_with_duplicates)
+        request.env.cr.execute("""
+            SELECT COUNT(*) FILTER (WHERE state = 'processed'),
+                   COUNT(*) FILTER (WHERE state = 'done'),
+                   COUNT(*) FILTER (WHERE state = 'error'),
+                   COUNT(*) FILTER (WHERE duplicate_count > 0),
+                   COALESCE(SUM(duplicate_count), 0),
+                   COALESCE(SUM(amount_ttc) FILTER (WHERE state IN ('done', 'processed')), 0),
+                   AVG(verification_duration) FILTER (
+                       WHERE verification_duration > 0 AND state IN ('done', 'processed')),
+                   COUNT(*) FILTER (WHERE is_manual_entry)
+            FROM invoice_scan_record
+            WHERE company_id = %s
+        """, (company_id,))
+        (processed_scans, unprocessed_scans, error_scans, records_with_duplicates,
+         total_duplicate_attempts, total_amount, avg_duration,
+         manual_entry_count) = request.env.cr.fetchone()
+        successful_scans = processed_scans + unprocessed_scans
         
         # Total scans = Réussis + Doublons + Erreurs (toutes les actions de scan)
         total_scans = successful_scans + total_duplicate_attempts + error_scans
         
-        # Montant total des factures scannées
-        records = ScanRecord.search([
-            ('company_id', '=', company_id),
-            ('state', 'in', ['done', 'processed'])
-        ])
-        total_amount = sum(r.amount_ttc for r in records)
-        
         # Durée moyenne de vérification
-        records_with_duration = ScanRecord.search([
-            ('company_id', '=', company_id),
-            ('verification_duration', '>', 0),
-            ('state', 'in', ['done', 'processed']),
-        ])
-        avg_verification_duration = 0
-        manual_entry_count = ScanRecord.search_count([
-            ('company_id', '=', company_id),
-            ('is_manual_entry', '=', True),
-        ])
-        if records_with_duration:
-            avg_verification_duration = round(
-                sum(r.verification_duration for r in records_with_duration) / len(records_with_duration), 1
-            )
+        avg_verification_duration = round(avg_duration, 1) if avg_duration else 0
         
-        return api_response({
+        result = {
             'total_scans': total_scans,
             'successful_scans': successful_scans,
             'processed_scans': processed_scans,
             'unprocessed_scans': unprocessed_scans,
             'error_scans': error_scans,
             'duplicate_attempts': total_duplicate_attempts,
-            'records_with_duplicates': len(records_with_duplicates),
+            'records_with_duplicates': records_with_duplicates,
             'total_amount': total_amount,
             'currency': 'XOF',
             'avg_verification_duration': avg_verification_duration,
             'manual_entry_count': manual_entry_count,
-        })
+        }
+        set_cached(dbname, 'stats', company_id, user.id, result, STATS_CACHE_TTL)
+        return self._stats_response(result)
+
+    def _stats_response(self, result):
+        """Réponse /stats avec ETag : les statistiques sont déjà calculées
+        (ou en cache), le 304 évite seulement le transfert."""
+        etag = compute_etag(sorted(result.items()))
+        return not_modified_response(etag) or with_etag(api_response(result), etag)
 
     # ==================== ENDPOINT SYNC OFFLINE ====================
 
     @http.route('/api/v1/invoice-scanner/sync', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def sync_offline_scans(self, user=None, **kw):
@@ -1513,9 +1854,6 @@ class InvoiceScannerMobileAPI(http.Controller):
         Returns:
         - results: Résultat pour chaque scan
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         data = get_json_body()
         scans = data.get('scans', [])
         
@@ -1582,6 +1920,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/sync-parsed', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def sync_parsed_scans(self, user=None, **kw):
@@ -1609,8 +1948,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - results: Résultat pour chaque scan
         - summary: Résumé (successful, duplicates, errors)
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         scans = data.get('scans', [])
@@ -1633,8 +1971,29 @@ class InvoiceScannerMobileAPI(http.Controller):
         
         try:
             ScanRecord = request.env['invoice.scan.record'].sudo()
+            company_id = request.env.company.id
             results = []
             
+            # Une seule recherche pour tout le lot : scans existants (réussis
+            # ou en erreur) par UUID. L'UUID est unique par société ; la table
+            # est tenue à jour au fil de la boucle pour qu'un même QR présent
+            # deux fois dans le lot soit détecté comme doublon.
+            uuids = {ScanRecord.extract_uuid_from_url((scan.get('qr_url') or '').strip()) for scan in scans}
+            uuids.discard(None)
+            existing_by_uuid = {
+                rec.qr_uuid: rec for rec in ScanRecord.search([
+                    ('qr_uuid', 'in', list(uuids)),
+                    ('company_id', '=', company_id),
+                ])
+            } if uuids else {}
+            # Tentatives de doublon du lot, journalisées en une fois après la
+            # boucle : scan id -> (première, dernière) tentative
+            duplicate_attempts = {}
+            # Scans enregistrés dont la facture reste à créer, par lot (cf.
+            # `_create_synced_invoices`) : [(scan, entrée de `results`)]
+            pending = []
+            pending_uuids = set()
+            
             for scan in scans:
                 qr_url = scan.get('qr_url', '').strip()
                 scanned_at = scan.get('scanned_at')
@@ -1659,18 +2018,25 @@ class InvoiceScannerMobileAPI(http.Controller):
                     })
                     continue
                 
-                # Vérifier les doublons
-                existing = ScanRecord.check_duplicate(qr_uuid)
+                # Un QR déjà présent plus haut dans le lot et pas encore
+                # facturé : créer d'abord les factures en attente, pour que
+                # son état (facturé ou en erreur) décide comme avant du doublon
+                if qr_uuid in pending_uuids:
+                    self._create_synced_invoices(pending)
+                    pending = []
+                    pending_uuids.clear()
+                
+                # Vérifier les doublons (cf. `check_duplicate` : scans réussis uniquement)
+                known = existing_by_uuid.get(qr_uuid, ScanRecord)
+                existing = known if known.state in ('done', 'processed') else ScanRecord
                 if existing:
                     existing.write({
                         'duplicate_count': existing.duplicate_count + 1,
                         'last_duplicate_attempt': fields.Datetime.now(),
                         'last_duplicate_user_id': user.id,
                     })
-                    existing.message_post(
-                        body=f"Tentative de scan doublon #{existing.duplicate_count} (sync pré-parsé) par {user.name}",
-                        message_type='notification'
-                    )
+                    first, _last = duplicate_attempts.get(existing.id, (existing.duplicate_count,) * 2)
+                    duplicate_attempts[existing.id] = (first, existing.duplicate_count)
                     results.append({
                         'qr_url': qr_url,
                         'success': False,
@@ -1709,11 +2075,7 @@ class InvoiceScannerMobileAPI(http.Controller):
                         pass
                 
                 # Vérifier s'il existe un enregistrement en erreur pour ce QR
-                existing_error = ScanRecord.search([
-                    ('qr_uuid', '=', qr_uuid),
-                    ('state', '=', 'error'),
-                    ('company_id', '=', request.env.company.id)
-                ], limit=1)
+                existing_error = known if known.state == 'error' else ScanRecord
                 
                 # Créer l'enregistrement de scan avec les données pré-parsées
                 record_vals = {
@@ -1731,42 +2093,44 @@ class InvoiceScannerMobileAPI(http.Controller):
                     'error_message': False,
                 }
                 
+                entry = {'qr_url': qr_url, 'scanned_at': scanned_at}
+                results.append(entry)
                 try:
-                    if existing_error:
-                        existing_error.write(record_vals)
-                        record = existing_error
-                    else:
-                        record_vals['qr_uuid'] = qr_uuid
-                        record = ScanRecord.create(record_vals)
-                    
-                    record.message_post(
-                        body="Scan synchronisé avec données pré-extraites côté mobile",
-                        message_type='notification'
-                    )
-                    
-                    # Créer la facture
-                    invoice = record._create_invoice()
-                    results.append({
-                        'qr_url': qr_url,
-                        'scanned_at': scanned_at,
-                        'success': True,
-                        'message': 'Facture créée avec succès (données pré-parsées)',
-                        'record_id': record.id,
-                        'invoice_id': invoice.id,
-                        'invoice_name': invoice.name,
-                    })
+                    with request.env.cr.savepoint():
+                        if existing_error:
+                            existing_error.write(record_vals)
+                            record = existing_error
+                        else:
+                            record_vals['qr_uuid'] = qr_uuid
+                            record = ScanRecord.create(record_vals)
                 except Exception as e:
-                    _logger.warning(f"Erreur création facture (sync parsed) pour {qr_url}: {e}")
-                    if existing_error or ScanRecord.search([('qr_uuid', '=', qr_uuid)], limit=1):
-                        rec = existing_error or ScanRecord.search([('qr_uuid', '=', qr_uuid)], limit=1)
-                        rec.write({'state': 'error', 'error_message': str(e)})
-                    results.append({
-                        'qr_url': qr_url,
-                        'scanned_at': scanned_at,
+                    _logger.warning(f"Erreur enregistrement scan (sync parsed) pour {qr_url}: {e}")
+                    if existing_error:
+                        existing_error.write({'state': 'error', 'error_message': str(e)})
+                    entry.update({
                         'success': False,
                         'error': f'Erreur lors de la création de la facture: {safe_error_message(e)}',
                         'error_code': 'INVOICE_ERROR',
                     })
+                    continue
+                existing_by_uuid[qr_uuid] = record
+                pending.append((record, entry))
+                pending_uuids.add(qr_uuid)
+            
+            self._create_synced_invoices(pending)
+            
+            if duplicate_attempts:
+                ScanRecord.browse(list(duplicate_attempts))._message_log_batch(
+                    bodies={
+                        record_id: (
+                            f"Tentative de scan doublon #{first} (sync pré-parsé) par {user.name}"
+                            if first == last else
+                            f"Tentatives de scan doublon #{first} à #{last} (sync pré-parsé) par {user.name}"
+                        )
+                        for record_id, (first, last) in duplicate_attempts.items()
+                    },
+                    message_type='notification',
+                )
         finally:
             release_scan_slot()
         
@@ -1785,10 +2149,51 @@ class InvoiceScannerMobileAPI(http.Controller):
             }
         })
 
+    def _create_synced_invoices(self, pending):
+        """Créer les factures des scans enregistrés par sync-parsed.
+
+        Un seul lot de messages et un seul `_create_invoices_batch` pour
+        tous les scans en attente : recherches de fournisseurs, journal et
+        compte de dépense mutualisées, chaque facture dans son savepoint.
+        Complète en place les entrées de `results` correspondantes.
+
+        Args:
+            pending: Liste de (scan, entrée de résultat)
+        """
+        if not pending:
+            return
+        records = request.env['invoice.scan.record'].sudo().browse(
+            [record.id for record, _entry in pending])
+        records._message_log_batch(
+            bodies={record.id: "Scan synchronisé avec données pré-extraites côté mobile"
+                    for record in records},
+            message_type='notification',
+        )
+        outcomes = records._create_invoices_batch()
+        for record, entry in pending:
+            outcome = outcomes[record.id]
+            if isinstance(outcome, Exception):
+                _logger.warning(f"Erreur création facture (sync parsed) pour {entry['qr_url']}: {outcome}")
+                record.write({'state': 'error', 'error_message': str(outcome)})
+                entry.update({
+                    'success': False,
+                    'error': f'Erreur lors de la création de la facture: {safe_error_message(outcome)}',
+                    'error_code': 'INVOICE_ERROR',
+                })
+                continue
+            entry.update({
+                'success': True,
+                'message': 'Facture créée avec succès (données pré-parsées)',
+                'record_id': record.id,
+                'invoice_id': outcome.id,
+                'invoice_name': outcome.name,
+            })
+
     # ==================== ENDPOINT ERREURS ====================
 
     @http.route('/api/v1/invoice-scanner/errors', type='http', auth='none',
                 methods=['GET', 'POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def get_errors(self, user=None, **kw):
@@ -1800,20 +2205,16 @@ class InvoiceScannerMobileAPI(http.Controller):
         - date_from: Date de début (format YYYY-MM-DD)
         - date_to: Date de fin (format YYYY-MM-DD)
         - retry_possible: Filtrer les erreurs pouvant être réessayées (true/false)
+        - force_count: Compter exactement au-delà de ERRORS_COUNT_LIMIT (true/false)
+        - fields: Clés à renvoyer par erreur, séparées par des virgules (défaut: toutes)
         
         Returns:
         - errors: Liste des scans en erreur avec détails
         - pagination: Informations de pagination
         - summary: Résumé des erreurs
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
-            
         # Accepter les paramètres en GET ou POST
-        if request.httprequest.method == 'POST':
-            data = get_json_body()
-        else:
-            data = dict(request.httprequest.args)
+        data = get_request_params()
         
         try:
             page = max(1, int(data.get('page', 1)))
@@ -1823,12 +2224,21 @@ class InvoiceScannerMobileAPI(http.Controller):
         date_from = validate_date_param(data.get('date_from'))
         date_to = validate_date_param(data.get('date_to'))
         retry_possible = data.get('retry_possible')
+        force_count = str(data.get('force_count', '')).lower() == 'true'
+        # Champs demandés (ex: fields=id,reference,error_message) ; clés inconnues ignorées
+        requested = data.get('fields')
+        if isinstance(requested, str):
+            requested = requested.split(',')
+        requested = {str(key).strip() for key in requested or []}
+        error_keys = [key for key in ERROR_API_FIELDS if key in requested]
+        error_keys = error_keys or list(ERROR_API_FIELDS)
         
         ScanRecord = request.env['invoice.scan.record'].sudo()
+        company_id = request.env.company.id
         
         # Construire le domaine
         domain = [
-            ('company_id', '=', request.env.company.id),
+            ('company_id', '=', company_id),
             ('state', '=', 'error')
         ]
         
@@ -1840,49 +2250,86 @@ class InvoiceScannerMobileAPI(http.Controller):
         if retry_possible == 'true':
             domain.append(('invoice_id', '=', False))
         
-        # Comptage total
-        total_count = ScanRecord.search_count(domain)
+        # ETag : empreinte des erreurs de la société (nombre + dernière
+        # modification) et des paramètres, calculée avant de construire la
+        # page. Un scan qui sort de l'état erreur modifie le nombre, un scan
+        # qui y entre modifie la date.
+        [(errors_count, errors_write_date)] = ScanRecord._read_group(
+            [('company_id', '=', company_id), ('state', '=', 'error')],
+            groupby=[], aggregates=['__count', 'write_date:max'])
+        etag = compute_etag(
+            company_id, errors_count, str(errors_write_date),
+            page, limit, date_from, date_to, retry_possible, force_count, error_keys,
+        )
+        not_modified = not_modified_response(etag)
+        if not_modified:
+            return not_modified
+        
+        # Comptage total, plafonné sauf demande explicite (force_count=true) :
+        # un COUNT exact sur un gros volume d'erreurs coûte plus que la page
+        if force_count:
+            total_count = ScanRecord.search_count(domain)
+        else:
+            total_count = ScanRecord.search_count(domain, limit=ERRORS_COUNT_LIMIT + 1)
+        count_exceeded = not force_count and total_count > ERRORS_COUNT_LIMIT
         
         # Récupérer les enregistrements
         offset = (page - 1) * limit
         records = ScanRecord.search(domain, limit=limit, offset=offset, order='scan_date desc')
         
-        # Formater les erreurs avec plus de détails
+        # Formater les erreurs avec plus de détails : une seule lecture en lot,
+        # les many2one arrivent sous forme (id, nom). `read([])` lirait TOUS
+        # les champs : `fields=id` se contente des ids déjà connus.
+        fnames = sorted({ERROR_API_FIELDS[key] for key in error_keys} - {'id'})
+        rows = records.read(fnames) if fnames else [{'id': record_id} for record_id in records.ids]
         errors_data = []
-        for r in records:
-            errors_data.append({
-                'id': r.id,
-                'reference': r.reference,
-                'qr_uuid': r.qr_uuid,
-                'qr_url': r.qr_url,
-                'supplier_name': r.supplier_name or '',
-                'invoice_number_dgi': r.invoice_number_dgi or '',
-                'amount_ttc': r.amount_ttc,
-                'error_message': r.error_message or 'Erreur inconnue',
-                'error_type': self._classify_error(r.error_message),
-                'scan_date': r.scan_date.isoformat() if r.scan_date else None,
-                'scanned_by': r.scanned_by.name if r.scanned_by else '',
-                'scanned_by_id': r.scanned_by.id if r.scanned_by else None,
-                'can_retry': not r.invoice_id,  # Peut réessayer si pas de facture créée
-                'retry_count': r.duplicate_count,  # Réutiliser pour compter les tentatives
-            })
-        
-        # Résumé des types d'erreurs
-        all_errors = ScanRecord.search([
-            ('company_id', '=', request.env.company.id),
-            ('state', '=', 'error')
-        ])
+        for row in rows:
+            scanned_by = row.get('scanned_by')
+            error_row = {
+                'id': row['id'],
+                'reference': row.get('reference'),
+                'qr_uuid': row.get('qr_uuid'),
+                'qr_url': row.get('qr_url'),
+                'supplier_name': row.get('supplier_name') or '',
+                'invoice_number_dgi': row.get('invoice_number_dgi') or '',
+                'amount_ttc': row.get('amount_ttc'),
+                'error_message': row.get('error_message') or 'Erreur inconnue',
+                'error_type': _classify_error(row.get('error_message')),
+                'scan_date': row['scan_date'].isoformat() if row.get('scan_date') else None,
+                'scanned_by': scanned_by[1] if scanned_by else '',
+                'scanned_by_id': scanned_by[0] if scanned_by else None,
+                'can_retry': not row.get('invoice_id'),  # Peut réessayer si pas de facture créée
+                'retry_count': row.get('duplicate_count'),  # Réutiliser pour compter les tentatives
+            }
+            if len(error_keys) < len(ERROR_API_FIELDS):
+                error_row = {key: error_row[key] for key in error_keys}
+            errors_data.append(error_row)
+        
+        # Résumé des types d'erreurs : une seule passe SQL (COUNT ... FILTER)
+        # au lieu de charger toutes les erreurs et de les filtrer en Python
+        ScanRecord.flush_model(['company_id', 'state', 'error_message', 'invoice_id'])
+        request.env.cr.execute("""
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE error_message ILIKE '%%dgi%%'),
+                   COUNT(*) FILTER (WHERE error_message ILIKE ANY (ARRAY['%%timeout%%', '%%connection%%', '%%network%%', '%%réseau%%'])),
+                   COUNT(*) FILTER (WHERE error_message ILIKE ANY (ARRAY['%%parse%%', '%%extract%%', '%%format%%'])),
+                   COUNT(*) FILTER (WHERE error_message ILIKE ANY (ARRAY['%%facture%%', '%%invoice%%', '%%compte%%', '%%journal%%'])),
+                   COUNT(*) FILTER (WHERE invoice_id IS NULL)
+            FROM invoice_scan_record
+            WHERE company_id = %s AND state = 'error'
+        """, (company_id,))
+        total, dgi, network, parsing, invoice, can_retry = request.env.cr.fetchone()
         
         error_summary = {
-            'total': len(all_errors),
-            'dgi_errors': len(all_errors.filtered(lambda r: 'DGI' in (r.error_message or '').upper())),
-            'network_errors': len(all_errors.filtered(lambda r: any(k in (r.error_message or '').lower() for k in ['timeout', 'connection', 'network', 'réseau']))),
-            'parsing_errors': len(all_errors.filtered(lambda r: any(k in (r.error_message or '').lower() for k in ['parse', 'extract', 'format']))),
-            'invoice_errors': len(all_errors.filtered(lambda r: any(k in (r.error_message or '').lower() for k in ['facture', 'invoice', 'compte', 'journal']))),
-            'can_retry': len(all_errors.filtered(lambda r: not r.invoice_id)),
+            'total': total,
+            'dgi_errors': dgi,
+            'network_errors': network,
+            'parsing_errors': parsing,
+            'invoice_errors': invoice,
+            'can_retry': can_retry,
         }
         
-        return api_response({
+        return with_etag(api_response({
             'errors': errors_data,
             'pagination': {
                 'page': page,
@@ -1891,30 +2338,14 @@ class InvoiceScannerMobileAPI(http.Controller):
                 'total_pages': (total_count + limit - 1) // limit,
                 'has_next': offset + limit < total_count,
                 'has_previous': page > 1,
+                'count_exceeded': count_exceeded,
             },
             'summary': error_summary,
-        })
-
-    def _classify_error(self, error_message):
-        """Classifier le type d'erreur pour faciliter le filtrage."""
-        if not error_message:
-            return 'unknown'
-        
-        msg_lower = error_message.lower()
-        
-        if 'dgi' in msg_lower or 'fne' in msg_lower:
-            return 'dgi_service'
-        elif any(k in msg_lower for k in ['timeout', 'connection', 'network', 'réseau', 'connexion']):
-            return 'network'
-        elif any(k in msg_lower for k in ['parse', 'extract', 'format', 'uuid', 'url']):
-            return 'parsing'
-        elif any(k in msg_lower for k in ['facture', 'invoice', 'compte', 'journal', 'partner']):
-            return 'invoice_creation'
-        else:
-            return 'other'
+        }), etag)
 
     @http.route('/api/v1/invoice-scanner/errors/<int:record_id>/retry', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def retry_error(self, record_id, user=None, **kw):
@@ -1925,8 +2356,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - record: Enregistrement mis à jour
         - invoice: Facture créée (si succès)
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         ScanRecord = request.env['invoice.scan.record'].sudo()
         record = ScanRecord.browse(record_id)
@@ -1972,6 +2402,7 @@ class InvoiceScannerMobileAPI(http.Controller):
 
     @http.route('/api/v1/invoice-scanner/errors/bulk-retry', type='http', auth='none',
                 methods=['POST', 'OPTIONS'], csrf=False, cors='*')
+    @cors_preflight
     @api_exception_handler
     @require_auth
     def bulk_retry_errors(self, user=None, **kw):
@@ -1985,8 +2416,7 @@ class InvoiceScannerMobileAPI(http.Controller):
         - results: Résultat pour chaque enregistrement
         - summary: Résumé des résultats
         """
-        if request.httprequest.method == 'OPTIONS':
-            return Response(status=200)
+        _invalidate_read_cache()
             
         data = get_json_body()
         record_ids = data.get('record_ids', [])
@@ -2020,28 +2450,34 @@ class InvoiceScannerMobileAPI(http.Controller):
             )
         
         try:
+            # Traitement séquentiel : `_create_invoice` ne fait que des accès
+            # base (plus d'appel DGI côté serveur), il n'y a pas d'attente
+            # réseau à paralléliser. `_create_invoices_batch` isole chaque
+            # tentative dans un savepoint et mutualise les recherches
+            # (fournisseurs, journal, compte de dépense) sur tout le lot.
+            outcomes = records._create_invoices_batch()
             results = []
             for record in records:
-                try:
-                    invoice = record._create_invoice()
-                    results.append({
-                        'record_id': record.id,
-                        'reference': record.reference,
-                        'success': True,
-                        'invoice_id': invoice.id,
-                        'invoice_name': invoice.name,
-                    })
-                except Exception as e:
-                    _logger.error(f"Échec bulk-retry record {record.id}: {e}")
+                outcome = outcomes[record.id]
+                if isinstance(outcome, Exception):
+                    _logger.error(f"Échec bulk-retry record {record.id}: {outcome}")
                     record.write({
-                        'error_message': f'Tentative groupée échouée: {str(e)}'
+                        'error_message': f'Tentative groupée échouée: {str(outcome)}'
                     })
                     results.append({
                         'record_id': record.id,
                         'reference': record.reference,
                         'success': False,
-                        'error': safe_error_message(e),
+                        'error': safe_error_message(outcome),
                     })
+                    continue
+                results.append({
+                    'record_id': record.id,
+                    'reference': record.reference,
+                    'success': True,
+                    'invoice_id': outcome.id,
+                    'invoice_name': outcome.name,
+                })
         finally:
             release_scan_slot()
         
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Cache mémoire des tokens API validés.
+
+Chaque requête authentifiée recherchait le token en base
+(`invoice.scanner.api.token`). Un token validé est mémorisé quelques
+secondes : les requêtes suivantes du même appareil évitent la recherche.
+
+Fonctionne par worker Odoo (dictionnaire protégé par un verrou) :
+- Clé = (base de données, hash du token) : un worker sert plusieurs bases,
+  et un `user_id` n'a de sens que dans la base où le token a été validé
+- En mode multi-worker (prefork), chaque worker a son propre cache
+- La déconnexion invalide l'entrée du worker qui la traite ; les autres
+  workers acceptent encore le token au plus TOKEN_CACHE_TTL secondes.
+  Même chose pour une révocation depuis le backend : le TTL borne cette
+  fenêtre et doit rester court. L'archivage de l'utilisateur, lui, est
+  contrôlé à chaque requête (cf. `_verify_api_token`).
+"""
+
+import threading
+import time
+
+# ==================== CONFIGURATION ====================
+
+# Durée de mémorisation d'un token validé (secondes)
+TOKEN_CACHE_TTL = 30
+
+# Nombre max de tokens mémorisés par worker
+MAX_CACHED_TOKENS = 10000
+
+# ==================== CACHE GLOBAL ====================
+
+_cache_lock = threading.Lock()
+_cache = {}  # (dbname, token_hash) -> (user_id, expires_at, cache_expire_à)
+
+
+def get_cached_token(dbname, token_hash, now):
+    """Retourner l'user_id du token s'il est en cache et non expiré, sinon None.
+
+    Args:
+        dbname: Base de données de la requête
+        token_hash: Hash du token (cf. `_hash_token`)
+        now: Datetime courant (UTC naïf, comme `fields.Datetime.now()`)
+    """
+    with _cache_lock:
+        entry = _cache.get((dbname, token_hash))
+        if not entry:
+            return None
+        user_id, expires_at, cache_until = entry
+        if cache_until <= time.monotonic() or expires_at <= now:
+            del _cache[(dbname, token_hash)]
+            return None
+        return user_id
+
+
+def cache_token(dbname, token_hash, user_id, expires_at):
+    """Mémoriser un token qui vient d'être validé en base."""
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHED_TOKENS:
+            _cache.clear()
+        _cache[(dbname, token_hash)] = (user_id, expires_at, time.monotonic() + TOKEN_CACHE_TTL)
+
+
+def invalidate_token(dbname, token_hash):
+    """Oublier un token (déconnexion)."""
+    with _cache_lock:
+        _cache.pop((dbname, token_hash), None)
@@ -3,7 +3,8 @@
 Extension du modèle account.move pour les factures scannées
 """
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import UserError
 
 
 class AccountMove(models.Model):
@@ -23,10 +24,12 @@ class AccountMove(models.Model):
         help="Lien vers l'enregistrement du scan QR"
     )
     
+    # Non stocké : simple reflet de `qr_scan_uuid` (déjà indexé), inutile de
+    # le recalculer et de l'écrire à chaque modification de l'UUID.
     is_from_qr_scan = fields.Boolean(
         string="Créée par scan QR",
         compute='_compute_is_from_qr_scan',
-        store=True
+        search='_search_is_from_qr_scan',
     )
 
     @api.depends('qr_scan_uuid')
@@ -34,6 +37,12 @@ class AccountMove(models.Model):
         for move in self:
             move.is_from_qr_scan = bool(move.qr_scan_uuid)
 
+    def _search_is_from_qr_scan(self, operator, value):
+        if operator not in ('=', '!='):
+            raise UserError(_("Opérateur non supporté pour « Créée par scan QR » : %s") % operator)
+        scanned = bool(value) == (operator == '=')
+        return [('qr_scan_uuid', '!=' if scanned else '=', False)]
+
 
 class ResPartner(models.Model):
     """Extension de res.partner pour stocker le code DGI."""
@@ -44,3 +53,21 @@ class ResPartner(models.Model):
         index=True,
         help="Code d'identification fiscale DGI (ex: 2502298K)"
     )
+
+    def init(self):
+        """Index trigramme sur le nom, pour la recherche du fournisseur.
+
+        `_get_or_create_supplier` se replie sur `('name', 'ilike', ...)`,
+        qu'un btree ne peut pas servir. Redéclarer `name` avec
+        `index='trigram'` ne suffit pas : `base` crée déjà le btree
+        `res_partner_name_index` et Odoo ne convertit jamais un index
+        existant. Index GIN distinct, créé seulement si pg_trgm est
+        disponible (sinon, pas d'index : le btree reste seul).
+        """
+        super().init()
+        if self.pool.has_trigram:
+            tools.create_index(
+                self._cr, 'res_partner_name_trgm_idx', self._table,
+                ['name gin_trgm_ops'], method='gin',
+            )
+
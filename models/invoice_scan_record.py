@@ -6,12 +6,58 @@ Modèle pour enregistrer les scans de QR-code de factures
 import logging
 import re
 from datetime import datetime, timedelta
+from functools import wraps
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, Command, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.osv import expression
+
+from . import response_cache
 
 _logger = logging.getLogger(__name__)
 
+# UUID de vérification DGI : 8-4-4-4-12 caractères hexadécimaux
+UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.IGNORECASE)
+
+# Clé de `cr.postcommit.data` : sociétés dont la transaction a modifié des scans
+_DIRTY_COMPANIES_KEY = 'invoice_qr_scanner.dashboard_companies'
+
+
+def cached_dashboard(method):
+    """Mémoriser le résultat d'un tableau de bord quelques secondes.
+
+    Les dashboards OWL sont rechargés à chaque changement de période et à
+    chaque retour sur l'écran. Le résultat est mis en cache par base /
+    société / utilisateur / langue / fuseau / jour / arguments (libellés
+    traduits et dates locales font partie du résultat), dans le cache par
+    worker de l'API (`response_cache`), et invalidé après le commit de toute
+    écriture sur les scans de la société. Une transaction qui a modifié des
+    scans de la société ne lit ni n'alimente le cache : ses propres
+    écritures, pas encore validées, restent visibles pour elle seule. Un
+    repli d'erreur (`'error': True`) n'est jamais mis en cache.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        company_id = self.env.company.id
+        if company_id in self.env.cr.postcommit.data.get(_DIRTY_COMPANIES_KEY, ()):
+            return method(self, *args, **kwargs)
+        dbname = self.env.cr.dbname
+        key = (
+            self.env.uid, self.env.lang, self.env.context.get('tz') or self.env.user.tz,
+            fields.Date.today(), args, tuple(sorted(kwargs.items())),
+        )
+        cached = response_cache.get_cached(dbname, method.__name__, company_id, key)
+        if cached is not None:
+            return cached
+        result = method(self, *args, **kwargs)
+        if not result.get('error'):
+            response_cache.set_cached(
+                dbname, method.__name__, company_id, key, result,
+                response_cache.DASHBOARD_CACHE_TTL,
+            )
+        return result
+    return wrapper
+
 
 class InvoiceScanRecord(models.Model):
     """Enregistrement d'un scan de QR-code de facture DGI.
@@ -38,18 +84,20 @@ class InvoiceScanRecord(models.Model):
         index=True
     )
     
+    # Pas d'index simple : l'index unique (qr_uuid, company_id) de
+    # `qr_uuid_unique` le couvre déjà (UUID en tête). L'ancien index est
+    # supprimé dans `init()`. Pas de suivi : l'UUID est fixé à la création
+    # et en lecture seule ensuite.
     qr_uuid = fields.Char(
         string="UUID Vérification",
         required=True,
-        index=True,
-        tracking=True,
         help="UUID extrait de l'URL du QR-code (identifiant unique DGI)"
     )
     
+    # Pas de suivi : l'URL ne change pas sans l'UUID, déjà suivi
     qr_url = fields.Char(
         string="URL QR-code",
         required=True,
-        tracking=True
     )
     
     # Données récupérées du site DGI
@@ -139,17 +187,20 @@ class InvoiceScanRecord(models.Model):
         help="Utilisateur ayant marqué ce scan comme traité"
     )
     
+    # Pas de suivi : toujours écrit avec processed_by/state (suivis), et les
+    # actions de marquage postent déjà un message daté dans le chatter
     processed_date = fields.Datetime(
         string="Date de traitement",
         readonly=True,
-        tracking=True,
         help="Date/heure à laquelle le scan a été marqué comme traité"
     )
     
+    # Non stocké : simple reflet de `state`, recalculé à la lecture plutôt
+    # que réécrit à chaque changement d'état
     is_processed = fields.Boolean(
         string="Traité",
         compute='_compute_is_processed',
-        store=True,
+        search='_search_is_processed',
         help="Indique si le scan a été marqué comme traité/enregistré"
     )
     
@@ -210,8 +261,12 @@ class InvoiceScanRecord(models.Model):
         required=True
     )
     
+    # Historique uniquement : plus alimenté depuis la suppression de
+    # l'extraction DGI côté serveur. Exclu du préchargement pour ne pas
+    # détoaster ce texte à chaque lecture d'un scan.
     raw_html = fields.Text(
         string="Données brutes HTML",
+        prefetch=False,
         help="HTML récupéré du site DGI pour débogage"
     )
     
@@ -235,6 +290,52 @@ class InvoiceScanRecord(models.Model):
          'Ce QR-code a déjà été scanné pour cette société!')
     ]
 
+    def init(self):
+        """Index composites des listes de l'API et des tableaux de bord.
+
+        Table la plus écrite du module : chaque index coûte à chaque scan.
+        Seuls restent ceux qu'aucun autre ne couvre :
+
+        - (company_id, state, scan_date DESC) : historique et erreurs
+          filtrent sur société + état et paginent par date de scan ; sert
+          aussi bulk-retry (erreurs, lu dans l'autre sens) et la liste des
+          scans en attente du traiteur (`done`), dont les filtres restants
+          (`invoice_id`, `processed_by`) ne portent que sur ces lignes ;
+        - (company_id, scanned_by, scan_date) : agrégats du vérificateur
+          connecté, seul index portant `scanned_by` ;
+        - index partiel des scans doublonnés (duplicate_count > 0) : petit,
+          il sert les comptages de doublons d'une période des trois
+          tableaux de bord ;
+        - (company_id, processed_by, state, processed_date) : factures
+          traitées par le traiteur connecté, par plage de date de traitement.
+        """
+        super().init()
+        # Index simple de l'ancien `qr_uuid` (index=True) : retirer `index`
+        # ne le supprime pas, Odoo garde un index inattendu en le signalant.
+        # Idem pour les index couverts par `company_state_date_idx`.
+        for index_name in ('invoice_scan_record_qr_uuid_index',
+                           'invoice_scan_record_dashboard_idx',
+                           'invoice_scan_record_retry_idx',
+                           'invoice_scan_record_pending_idx'):
+            self._cr.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+        tools.create_index(
+            self._cr, 'invoice_scan_record_company_state_date_idx', self._table,
+            ['company_id', 'state', 'scan_date DESC'],
+        )
+        tools.create_index(
+            self._cr, 'invoice_scan_record_scanned_by_idx', self._table,
+            ['company_id', 'scanned_by', 'scan_date'],
+        )
+        tools.create_index(
+            self._cr, 'invoice_scan_record_duplicates_idx', self._table,
+            ['company_id', 'scan_date', 'duplicate_count'],
+            where="duplicate_count > 0",
+        )
+        tools.create_index(
+            self._cr, 'invoice_scan_record_processed_by_idx', self._table,
+            ['company_id', 'processed_by', 'state', 'processed_date'],
+        )
+
     # Borne de cohérence : au-delà, c'est presque certainement une erreur de
     # parsing du QR-code (100 milliards de FCFA).
     AMOUNT_TTC_MAX = 100_000_000_000
@@ -280,6 +381,12 @@ class InvoiceScanRecord(models.Model):
         for record in self:
             record.is_processed = record.state == 'processed'
 
+    def _search_is_processed(self, operator, value):
+        if operator not in ('=', '!='):
+            raise UserError(_("Opérateur non supporté pour « Traité » : %s") % operator)
+        processed = bool(value) == (operator == '=')
+        return [('state', '=' if processed else '!=', 'processed')]
+
     @staticmethod
     def _normalize_qr_uuid(qr_uuid):
         """Normaliser un UUID DGI en minuscules.
@@ -305,12 +412,45 @@ class InvoiceScanRecord(models.Model):
                 vals['reference'] = self.env['ir.sequence'].next_by_code('invoice.scan.record') or '/'
             if vals.get('qr_uuid'):
                 vals['qr_uuid'] = self._normalize_qr_uuid(vals['qr_uuid'])
-        return super().create(vals_list)
+        records = super().create(vals_list)
+        records._invalidate_dashboard_cache()
+        return records
 
     def write(self, vals):
         if vals.get('qr_uuid'):
             vals = dict(vals, qr_uuid=self._normalize_qr_uuid(vals['qr_uuid']))
-        return super().write(vals)
+        self._invalidate_dashboard_cache()
+        res = super().write(vals)
+        if 'company_id' in vals:
+            self._invalidate_dashboard_cache()
+        return res
+
+    def unlink(self):
+        self._invalidate_dashboard_cache()
+        return super().unlink()
+
+    def _invalidate_dashboard_cache(self):
+        """Invalider les tableaux de bord mis en cache pour ces scans.
+
+        Invalidation après commit (cf. `_invalidate_read_cache` côté API) :
+        invalider avant laisserait une requête concurrente, encore sur
+        l'ancien instantané, remettre en cache des totaux périmés pour tout
+        le TTL. D'ici au commit, `cached_dashboard` ignore le cache pour
+        ces sociétés dans la transaction courante. Locale au worker : les
+        autres workers resservent au plus DASHBOARD_CACHE_TTL secondes de
+        données anciennes.
+        """
+        postcommit = self.env.cr.postcommit
+        companies = postcommit.data.get(_DIRTY_COMPANIES_KEY)
+        if companies is None:
+            companies = postcommit.data[_DIRTY_COMPANIES_KEY] = set()
+            dbname = self.env.cr.dbname
+
+            def invalidate():
+                for company_id in companies:
+                    response_cache.invalidate_company(dbname, company_id)
+            postcommit.add(invalidate)
+        companies.update(self.company_id.ids)
 
     @api.ondelete(at_uninstall=False)
     def _unlink_except_processed(self):
@@ -400,11 +540,11 @@ class InvoiceScanRecord(models.Model):
             'processed_date': fields.Datetime.now(),
         })
         
-        for record in records:
-            record.message_post(
-                body=_("Scan marqué comme traité par %s") % self.env.user.name,
-                message_type='notification'
-            )
+        body = _("Scan marqué comme traité par %s") % self.env.user.name
+        records._message_log_batch(
+            bodies={record.id: body for record in records},
+            message_type='notification',
+        )
         
         return True
 
@@ -420,11 +560,11 @@ class InvoiceScanRecord(models.Model):
             'processed_date': False,
         })
         
-        for record in records:
-            record.message_post(
-                body=_("Scan remis à 'Facture créée' par %s") % self.env.user.name,
-                message_type='notification'
-            )
+        body = _("Scan remis à 'Facture créée' par %s") % self.env.user.name
+        records._message_log_batch(
+            bodies={record.id: body for record in records},
+            message_type='notification',
+        )
         
         return True
 
@@ -442,9 +582,7 @@ class InvoiceScanRecord(models.Model):
         # `re.search` lèverait un TypeError au lieu de renvoyer None.
         if not url:
             return None
-        # Pattern UUID: 8-4-4-4-12 caractères hexadécimaux
-        pattern = r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
-        match = re.search(pattern, url, re.IGNORECASE)
+        match = UUID_RE.search(url)
         return match.group(0).lower() if match else None
 
     def check_duplicate(self, qr_uuid):
@@ -521,59 +659,79 @@ class InvoiceScanRecord(models.Model):
         
         return Partner.create(partner_vals)
 
-    def _get_or_create_purchase_journal(self):
-        """Obtenir ou créer un journal d'achats."""
-        Journal = self.env['account.journal']
-        
-        # Chercher un journal d'achats existant
-        journal = Journal.search([
+    @api.model
+    def _get_purchase_journal_id(self, company_id):
+        """Journal d'achats de la société (id, ou False).
+
+        Pas de cache entre requêtes : un cache ORM obligeait à vider le
+        cache du registre entier à chaque écriture de journal ou de compte.
+        Les traitements par lot (`_create_invoices_batch`) ne résolvent le
+        journal qu'une fois par société.
+        """
+        return self.env['account.journal'].sudo().search([
             ('type', '=', 'purchase'),
-            ('company_id', '=', self.company_id.id),
-        ], limit=1)
-        
-        if journal:
-            return journal
-        
-        # Créer un journal d'achats
-        journal_vals = {
-            'name': 'Achats',
-            'code': 'ACH',
-            'type': 'purchase',
-            'company_id': self.company_id.id,
-        }
-        
-        return Journal.sudo().create(journal_vals)
+            ('company_id', '=', company_id),
+        ], limit=1).id
 
-    def _get_or_create_expense_account(self):
-        """Obtenir ou créer un compte de dépense."""
-        Account = self.env['account.account']
+    @api.model
+    def _get_expense_account_id(self, company_id):
+        """Compte de dépense de la société (id, ou False).
+
+        Résolu une fois par société dans les traitements par lot, comme
+        `_get_purchase_journal_id`.
+        """
+        Account = self.env['account.account'].sudo()
         
         # Chercher un compte de dépense existant
         expense_account = Account.search([
             ('account_type', '=', 'expense'),
-            ('company_id', '=', self.company_id.id),
+            ('company_id', '=', company_id),
         ], limit=1)
         
         if expense_account:
-            return expense_account
+            return expense_account.id
         
         # Essayer d'autres types de comptes de charge
         expense_account = Account.search([
             ('account_type', 'in', ['expense', 'expense_direct_cost', 'expense_depreciation']),
-            ('company_id', '=', self.company_id.id),
+            ('company_id', '=', company_id),
         ], limit=1)
         
         if expense_account:
-            return expense_account
+            return expense_account.id
         
         # Chercher par code (comptes de charges commencent souvent par 6)
-        expense_account = Account.search([
+        return Account.search([
             ('code', '=like', '6%'),
-            ('company_id', '=', self.company_id.id),
-        ], limit=1)
+            ('company_id', '=', company_id),
+        ], limit=1).id
+
+    def _get_or_create_purchase_journal(self):
+        """Obtenir ou créer un journal d'achats."""
+        Journal = self.env['account.journal']
         
-        if expense_account:
-            return expense_account
+        # Chercher un journal d'achats existant
+        journal_id = self._get_purchase_journal_id(self.company_id.id)
+        if journal_id:
+            return Journal.browse(journal_id)
+        
+        # Créer un journal d'achats
+        journal_vals = {
+            'name': 'Achats',
+            'code': 'ACH',
+            'type': 'purchase',
+            'company_id': self.company_id.id,
+        }
+        
+        return Journal.sudo().create(journal_vals)
+
+    def _get_or_create_expense_account(self):
+        """Obtenir ou créer un compte de dépense."""
+        Account = self.env['account.account']
+        
+        expense_account_id = self._get_expense_account_id(self.company_id.id)
+        if expense_account_id:
+            return Account.browse(expense_account_id)
         
         # Créer un compte de dépense par défaut
         account_vals = {
@@ -585,8 +743,13 @@ class InvoiceScanRecord(models.Model):
         
         return Account.sudo().create(account_vals)
 
-    def _create_invoice(self):
-        """Créer la facture fournisseur."""
+    def _create_invoice(self, partner=None, journal=None, expense_account=None):
+        """Créer la facture fournisseur.
+
+        `partner`, `journal` et `expense_account` peuvent être fournis par
+        l'appelant (cf. `_create_invoices_batch`) pour éviter de les
+        rechercher à nouveau ; sinon ils sont recherchés ou créés.
+        """
         self.ensure_one()
         
         # Vérifier si pas déjà fait
@@ -598,22 +761,23 @@ class InvoiceScanRecord(models.Model):
             raise UserError(_("Le montant TTC doit être supérieur à zéro pour créer une facture."))
         
         # Obtenir le fournisseur
-        partner = self._get_or_create_supplier()
+        partner = partner or self._get_or_create_supplier()
         self.partner_id = partner
         
         # Obtenir ou créer le journal d'achats
-        journal = self._get_or_create_purchase_journal()
+        journal = journal or self._get_or_create_purchase_journal()
         
         # Obtenir ou créer le compte de dépense
-        expense_account = self._get_or_create_expense_account()
+        expense_account = expense_account or self._get_or_create_expense_account()
         
         # Configuration : valider automatiquement ou pas
         auto_validate = self.env['ir.config_parameter'].sudo().get_param(
             'invoice_qr_scanner.auto_validate_invoice', 'True'
         ) in ('True', 'true', '1')
         
-        # Créer la facture en deux étapes pour éviter les contraintes de ligne
-        # Étape 1: Créer la facture sans lignes
+        # Créer la facture et sa ligne en un seul appel : la ligne de
+        # facture (comme en saisie manuelle) est équilibrée par la ligne de
+        # contrepartie que `account.move` génère lui-même à la création.
         invoice = self.env['account.move'].create({
             'move_type': 'in_invoice',
             'journal_id': journal.id,
@@ -623,11 +787,7 @@ class InvoiceScanRecord(models.Model):
             'qr_scan_uuid': self.qr_uuid,
             'qr_scan_record_id': self.id,
             'currency_id': self.currency_id.id,
-        })
-        
-        # Étape 2: Ajouter la ligne de facture avec le bon contexte
-        invoice.write({
-            'invoice_line_ids': [(0, 0, {
+            'invoice_line_ids': [Command.create({
                 'name': f"Facture scannée - {self.invoice_number_dgi or self.qr_uuid}",
                 'quantity': 1,
                 'price_unit': self.amount_ttc or 0,
@@ -653,6 +813,48 @@ class InvoiceScanRecord(models.Model):
         
         return invoice
 
+    def _create_invoices_batch(self):
+        """Créer les factures d'un lot de scans (réessai groupé, sync-parsed).
+
+        Les recherches qui ne dépendent pas du scan sont faites une fois pour
+        le lot : fournisseurs par code DGI (une seule requête), journal
+        d'achats et compte de dépense une fois par société. Chaque facture
+        reste créée dans son propre savepoint, pour qu'un scan en échec
+        n'annule pas les autres ; les valeurs résolues ne sont réutilisées
+        qu'après un succès (un savepoint annulé peut avoir défait leur
+        création).
+
+        Returns:
+            dict: {scan_id: facture créée, ou l'exception levée}
+        """
+        partners_by_code = {}
+        codes = [code for code in set(self.mapped('supplier_code_dgi')) if code]
+        if codes:
+            for partner in self.env['res.partner'].search([('dgi_code', 'in', codes)]):
+                partners_by_code.setdefault(partner.dgi_code, partner)
+        company_defaults = {}
+        results = {}
+        for record in self:
+            try:
+                with self.env.cr.savepoint():
+                    journal, expense_account = company_defaults.get(record.company_id.id) or (
+                        record._get_or_create_purchase_journal(),
+                        record._get_or_create_expense_account(),
+                    )
+                    invoice = record._create_invoice(
+                        partner=partners_by_code.get(record.supplier_code_dgi),
+                        journal=journal,
+                        expense_account=expense_account,
+                    )
+            except Exception as e:
+                results[record.id] = e
+                continue
+            results[record.id] = invoice
+            company_defaults[record.company_id.id] = (journal, expense_account)
+            if record.supplier_code_dgi:
+                partners_by_code.setdefault(record.supplier_code_dgi, invoice.partner_id)
+        return results
+
     def action_retry_create_invoice(self):
         """Réessayer de créer la facture après une erreur."""
         self.ensure_one()
@@ -681,6 +883,70 @@ class InvoiceScanRecord(models.Model):
         }
 
     @api.model
+    def _get_dashboard_totals(self, domain):
+        """Agréger les scans du domaine par état, en une seule requête.
+
+        Remplace la série de `search_count` par état et les `search()` +
+        `sum()` Python des tableaux de bord. Passe par `_read_group` : les
+        règles d'accès (multi-société, vérificateur, traiteur) s'appliquent
+        comme pour les `search_count` qu'il remplace.
+
+        Returns:
+            dict: nombres par catégorie d'état, montant TTC des scans réussis
+            et somme des tentatives de doublons (tous états confondus)
+        """
+        counts = dict.fromkeys(('draft', 'done', 'processed', 'error'), 0)
+        amount = duplicates = 0
+        for state, count, state_amount, state_duplicates in self._read_group(
+            domain, ['state'], ['__count', 'amount_ttc:sum', 'duplicate_count:sum'],
+        ):
+            counts[state] = count
+            duplicates += state_duplicates or 0
+            if state in ('done', 'processed'):
+                amount += state_amount or 0
+        return {
+            'total': sum(counts.values()),
+            'successful': counts['done'] + counts['processed'],
+            'processed': counts['processed'],
+            'pending': counts['draft'],
+            'error': counts['error'],
+            'amount': amount,
+            'duplicates': duplicates,
+        }
+
+    @api.model
+    def _get_avg_verification_duration(self, domain):
+        """Durée moyenne de vérification (s) des scans réussis du domaine.
+
+        Moyenne calculée par PostgreSQL (`AVG`), sans charger les scans ;
+        les durées nulles (saisie manuelle, anciens clients) sont exclues.
+        """
+        [(average,)] = self._read_group(
+            domain + [('verification_duration', '>', 0), ('state', 'in', ['done', 'processed'])],
+            [], ['verification_duration:avg'],
+        )
+        return round(average or 0, 1)
+
+    @api.model
+    def _read_group_by_day(self, domain, date_field, groupby=(), aggregates=('__count',)):
+        """Agréger les scans du domaine par jour, en une seule requête.
+
+        Remplace les boucles de `search_count` jour par jour des graphiques.
+        Les jours sont découpés en UTC, comme les bornes `datetime.combine()`
+        des domaines de période ; les jours sans scan sont absents du
+        résultat et complétés à zéro par l'appelant.
+
+        Yields:
+            tuple: (date, *groupby, *aggregates) pour chaque groupe
+        """
+        rows = self.with_context(tz='UTC')._read_group(
+            domain, [f'{date_field}:day', *groupby], list(aggregates),
+        )
+        for day, *values in rows:
+            yield (day.date() if isinstance(day, datetime) else day), *values
+
+    @api.model
+    @cached_dashboard
     def get_dashboard_data(self, period='month'):
         """Récupérer les données pour le tableau de bord du Responsable.
         
@@ -711,69 +977,66 @@ class InvoiceScanRecord(models.Model):
             # Domaine de base
             base_domain = [('company_id', '=', company_id)]
             date_from_dt = datetime.combine(date_from, datetime.min.time())
-            period_domain = base_domain + [('scan_date', '>=', fields.Datetime.to_string(date_from_dt))]
-            
-            # Statistiques globales
-            total_scans = self.search_count(period_domain)
-            successful_scans = self.search_count(period_domain + [('state', 'in', ['done', 'processed'])])
-            processed_scans = self.search_count(period_domain + [('state', '=', 'processed')])
-            error_scans = self.search_count(period_domain + [('state', '=', 'error')])
-            
-            # Comptage des doublons (somme des duplicate_count)
-            records_with_duplicates = self.search(period_domain + [('duplicate_count', '>', 0)])
-            duplicate_attempts = sum(r.duplicate_count for r in records_with_duplicates)
-            
-            # Montant total des factures réussies
-            successful_records = self.search(period_domain + [('state', 'in', ['done', 'processed'])])
-            total_amount = sum(r.amount_ttc for r in successful_records)
+            period_domain = base_domain + [('scan_date', '>=', date_from_dt)]
             
+            # Statistiques globales (une requête GROUP BY state)
+            totals = self._get_dashboard_totals(period_domain)
+            total_scans = totals['total']
+            successful_scans = totals['successful']
+            processed_scans = totals['processed']
+            error_scans = totals['error']
+            duplicate_attempts = totals['duplicates']
+            total_amount = totals['amount']
+            records_with_duplicates = self.search_count(period_domain + [('duplicate_count', '>', 0)])
+
             # Statistiques temporelles
             today_start = datetime.combine(today, datetime.min.time())
             week_start = today - timedelta(days=7)
             month_start = today.replace(day=1)
             
             today_scans = self.search_count(base_domain + [
-                ('scan_date', '>=', fields.Datetime.to_string(today_start))
+                ('scan_date', '>=', today_start)
             ])
             week_scans = self.search_count(base_domain + [
-                ('scan_date', '>=', fields.Datetime.to_string(datetime.combine(week_start, datetime.min.time())))
+                ('scan_date', '>=', datetime.combine(week_start, datetime.min.time()))
             ])
             month_scans = self.search_count(base_domain + [
-                ('scan_date', '>=', fields.Datetime.to_string(datetime.combine(month_start, datetime.min.time())))
+                ('scan_date', '>=', datetime.combine(month_start, datetime.min.time()))
             ])
             
             # Scans récents (10 derniers)
-            recent_scans = self.search(base_domain, limit=10, order='create_date desc')
+            # search_read : seules les colonnes affichées sont lues, et le nom
+            # des utilisateurs (many2one) est résolu en une seule requête
+            recent_scans = self.search_read(
+                base_domain,
+                ['reference', 'supplier_name', 'amount_ttc', 'state', 'scan_date', 'scanned_by'],
+                limit=10, order='create_date desc',
+            )
             recent_scans_data = [{
-                'id': r.id,
-                'reference': r.reference or '',
-                'supplier_name': r.supplier_name or '',
-                'amount_ttc': r.amount_ttc or 0,
-                'state': r.state or 'draft',
-                'scan_date': r.scan_date.isoformat() if r.scan_date else None,
-                'scanned_by_name': r.scanned_by.name if r.scanned_by else '',
+                'id': r['id'],
+                'reference': r['reference'] or '',
+                'supplier_name': r['supplier_name'] or '',
+                'amount_ttc': r['amount_ttc'] or 0,
+                'state': r['state'] or 'draft',
+                'scan_date': r['scan_date'].isoformat() if r['scan_date'] else None,
+                'scanned_by_name': r['scanned_by'][1] if r['scanned_by'] else '',
             } for r in recent_scans]
             
             # Top utilisateurs (5 premiers)
+            # _read_group plutôt que du SQL brut : les règles d'accès
+            # s'appliquent, et les noms des 5 utilisateurs sont lus en un lot
             top_users = []
             try:
-                self.env.cr.execute("""
-                    SELECT u.id, COALESCE(rp.name, u.login) as name, COUNT(s.id) as scan_count
-                    FROM invoice_scan_record s
-                    JOIN res_users u ON s.scanned_by = u.id
-                    LEFT JOIN res_partner rp ON u.partner_id = rp.id
-                    WHERE s.company_id = %s
-                    AND s.scan_date >= %s
-                    GROUP BY u.id, rp.name, u.login
-                    ORDER BY scan_count DESC
-                    LIMIT 5
-                """, (company_id, fields.Datetime.to_string(date_from_dt)))
-                
+                groups = self._read_group(
+                    period_domain + [('scanned_by', '!=', False)],
+                    ['scanned_by'], ['__count'],
+                    order='__count desc', limit=5,
+                )
                 top_users = [{
-                    'id': row[0],
-                    'name': row[1] or 'Utilisateur',
-                    'scan_count': row[2],
-                } for row in self.env.cr.fetchall()]
+                    'id': scanned_by.id,
+                    'name': scanned_by.name or scanned_by.login or 'Utilisateur',
+                    'scan_count': count,
+                } for scanned_by, count in groups]
             except Exception as e:
                 _logger.warning(f"Erreur récupération top users: {e}")
             
@@ -781,17 +1044,14 @@ class InvoiceScanRecord(models.Model):
             daily_data = []
             if period in ('week', 'month'):
                 days = 7 if period == 'week' else (today - today.replace(day=1)).days
+                # Le premier jour du graphique est `date_from` : period_domain
+                # couvre exactement la plage affichée
+                day_counts = dict(self._read_group_by_day(period_domain, 'scan_date'))
                 for i in range(days, -1, -1):
                     day = today - timedelta(days=i)
-                    day_start = datetime.combine(day, datetime.min.time())
-                    day_end = datetime.combine(day, datetime.max.time())
-                    count = self.search_count(base_domain + [
-                        ('scan_date', '>=', fields.Datetime.to_string(day_start)),
-                        ('scan_date', '<=', fields.Datetime.to_string(day_end)),
-                    ])
                     daily_data.append({
                         'date': day.strftime('%d/%m'),
-                        'count': count,
+                        'count': day_counts.get(day, 0),
                     })
             
             return {
@@ -809,7 +1069,7 @@ class InvoiceScanRecord(models.Model):
                     'processedScans': processed_scans,
                     'pendingScans': total_scans - successful_scans - error_scans,
                     'duplicateAttempts': duplicate_attempts,
-                    'recordsWithDuplicates': len(records_with_duplicates),
+                    'recordsWithDuplicates': records_with_duplicates,
                     'errorScans': error_scans,
                     'totalAmount': total_amount,
                     'todayScans': today_scans,
@@ -858,13 +1118,17 @@ class InvoiceScanRecord(models.Model):
             }
 
     @api.model
-    def get_dashboard_stats(self, date_start=None, date_end=None, period='month'):
+    @cached_dashboard
+    def get_dashboard_stats(self, date_start=None, date_end=None, period='month', include_all_time=True):
         """Récupérer les statistiques pour le dashboard OWL.
         
         Args:
             date_start: Date de début (format ISO)
             date_end: Date de fin (format ISO)
             period: Période d'analyse ('day', 'week', 'month', 'year', 'custom')
+            include_all_time: Calculer aussi les totaux globaux. Le client ne
+                les redemande pas à chaque changement de période : sans
+                `all_time_stats` dans la réponse, il garde les précédents.
             
         Returns:
             dict: Données formatées pour le dashboard OWL
@@ -897,71 +1161,57 @@ class InvoiceScanRecord(models.Model):
             # Domaine de base
             base_domain = [('company_id', '=', company_id)]
             date_from_dt = datetime.combine(date_from, datetime.min.time())
-            date_to_dt = datetime.combine(date_to, datetime.max.time())
+            # Borne haute exclusive : minuit du lendemain (intervalle semi-ouvert)
+            date_to_dt = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
             period_domain = base_domain + [
-                ('scan_date', '>=', fields.Datetime.to_string(date_from_dt)),
-                ('scan_date', '<=', fields.Datetime.to_string(date_to_dt)),
+                ('scan_date', '>=', date_from_dt),
+                ('scan_date', '<', date_to_dt),
             ]
             
-            # Statistiques de la période
-            done_scans = self.search_count(period_domain + [('state', 'in', ['done', 'processed'])])
-            processed_scans = self.search_count(period_domain + [('state', '=', 'processed')])
-            pending_scans = self.search_count(period_domain + [('state', 'in', ['draft', 'pending'])])
-            error_scans = self.search_count(period_domain + [('state', '=', 'error')])
-            
-            # Comptage des doublons de la période (somme des duplicate_count)
-            records_with_duplicates = self.search(period_domain + [('duplicate_count', '>', 0)])
-            duplicate_attempts = sum(r.duplicate_count for r in records_with_duplicates)
-            
+            # Statistiques de la période (une requête GROUP BY state)
+            totals = self._get_dashboard_totals(period_domain)
+            done_scans = totals['successful']
+            processed_scans = totals['processed']
+            error_scans = totals['error']
+            duplicate_attempts = totals['duplicates']
+            total_amount = totals['amount']
+            records_with_duplicates = self.search_count(period_domain + [('duplicate_count', '>', 0)])
+
             # Total scans = Réussis + Doublons + Erreurs (représente toutes les actions de scan)
             total_scans = done_scans + duplicate_attempts + error_scans
-            
-            # === TOTAUX GLOBAUX (ALL-TIME) pour correspondre à l'application mobile ===
-            all_time_done = self.search_count(base_domain + [('state', 'in', ['done', 'processed'])])
-            all_time_processed = self.search_count(base_domain + [('state', '=', 'processed')])
-            all_time_error = self.search_count(base_domain + [('state', '=', 'error')])
-            all_time_records_with_dup = self.search(base_domain + [('duplicate_count', '>', 0)])
-            all_time_duplicates = sum(r.duplicate_count for r in all_time_records_with_dup)
-            # Total scans = Réussis + Doublons + Erreurs
-            all_time_total = all_time_done + all_time_duplicates + all_time_error
-            all_time_records = self.search(base_domain + [('state', 'in', ['done', 'processed'])])
-            all_time_amount = sum(r.amount_ttc for r in all_time_records)
-            
-            # Montant total des factures réussies
-            successful_records = self.search(period_domain + [('state', 'in', ['done', 'processed'])])
-            total_amount = sum(r.amount_ttc for r in successful_records)
-            
+
             # Scans récents (5 derniers)
-            recent_scans = self.search(base_domain, limit=5, order='create_date desc')
+            recent_scans = self.search_read(
+                base_domain,
+                ['reference', 'supplier_name', 'amount_ttc', 'state', 'duplicate_count'],
+                limit=5, order='create_date desc',
+            )
             recent_scans_data = [{
-                'id': r.id,
-                'reference': r.reference or '',
-                'nom_fournisseur': r.supplier_name or 'N/A',
-                'montant_ttc': r.amount_ttc or 0,
-                'state': 'processed' if r.state == 'processed' else ('verified' if r.state == 'done' else ('error' if r.state == 'error' else 'pending')),
-                'duplicate_count': r.duplicate_count,
+                'id': r['id'],
+                'reference': r['reference'] or '',
+                'nom_fournisseur': r['supplier_name'] or 'N/A',
+                'montant_ttc': r['amount_ttc'] or 0,
+                'state': 'processed' if r['state'] == 'processed' else ('verified' if r['state'] == 'done' else ('error' if r['state'] == 'error' else 'pending')),
+                'duplicate_count': r['duplicate_count'],
             } for r in recent_scans]
             
             # Top fournisseurs (5 premiers)
             top_suppliers = []
             try:
                 self.env.cr.execute("""
-                    SELECT supplier_name, COUNT(*) as scan_count
+                    SELECT supplier_name AS name, COUNT(*) AS count
                     FROM invoice_scan_record
                     WHERE company_id = %s
                     AND supplier_name IS NOT NULL
                     AND supplier_name != ''
                     AND scan_date >= %s
-                    AND scan_date <= %s
+                    AND scan_date < %s
                     GROUP BY supplier_name
-                    ORDER BY scan_count DESC
+                    ORDER BY count DESC
                     LIMIT 5
-                """, (company_id, fields.Datetime.to_string(date_from_dt), fields.Datetime.to_string(date_to_dt)))
-                
-                top_suppliers = [{
-                    'name': row[0] or 'Non défini',
-                    'count': row[1],
-                } for row in self.env.cr.fetchall()]
+                """, (company_id, date_from_dt, date_to_dt))
+                # Lignes déjà au format de la réponse (noms vides exclus en SQL)
+                top_suppliers = self.env.cr.dictfetchall()
             except Exception as e:
                 _logger.warning(f"Erreur récupération top suppliers: {e}")
             
@@ -971,23 +1221,19 @@ class InvoiceScanRecord(models.Model):
             chart_verified = []
             
             if period in ('week', 'month', 'custom'):
+                day_totals = {}
+                day_done = {}
+                for day, state, count in self._read_group_by_day(period_domain, 'scan_date', ['state']):
+                    day_totals[day] = day_totals.get(day, 0) + count
+                    if state == 'done':
+                        day_done[day] = count
+
                 days = (date_to - date_from).days
                 for i in range(days, -1, -1):
                     day = date_to - timedelta(days=i)
-                    day_start = datetime.combine(day, datetime.min.time())
-                    day_end = datetime.combine(day, datetime.max.time())
-                    
-                    day_domain = base_domain + [
-                        ('scan_date', '>=', fields.Datetime.to_string(day_start)),
-                        ('scan_date', '<=', fields.Datetime.to_string(day_end)),
-                    ]
-                    
-                    day_total = self.search_count(day_domain)
-                    day_done = self.search_count(day_domain + [('state', '=', 'done')])
-                    
                     chart_labels.append(day.strftime('%d/%m'))
-                    chart_scans.append(day_total)
-                    chart_verified.append(day_done)
+                    chart_scans.append(day_totals.get(day, 0))
+                    chart_verified.append(day_done.get(day, 0))
             else:
                 # Pour day et year, utiliser des données simplifiées
                 chart_labels = ['Aujourd\'hui'] if period == 'day' else ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Jun', 'Jul', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc']
@@ -995,39 +1241,21 @@ class InvoiceScanRecord(models.Model):
                 chart_verified = [done_scans] if period == 'day' else [0] * 12
             
             # Durée moyenne de vérification (période)
-            records_with_dur = self.search(period_domain + [('verification_duration', '>', 0), ('state', 'in', ['done', 'processed'])])
-            avg_verification_duration = round(sum(r.verification_duration for r in records_with_dur) / len(records_with_dur), 1) if records_with_dur else 0
+            avg_verification_duration = self._get_avg_verification_duration(period_domain)
             manual_entry_count = self.search_count(period_domain + [('is_manual_entry', '=', True)])
             
-            # Durée moyenne globale
-            all_time_dur_records = self.search(base_domain + [('verification_duration', '>', 0), ('state', 'in', ['done', 'processed'])])
-            all_time_avg_duration = round(sum(r.verification_duration for r in all_time_dur_records) / len(all_time_dur_records), 1) if all_time_dur_records else 0
-            all_time_manual = self.search_count(base_domain + [('is_manual_entry', '=', True)])
-            
-            return {
+            result = {
                 'stats': {
                     'total_scans': total_scans,
                     'successful_scans': done_scans,
                     'processed_scans': processed_scans,
                     'duplicate_attempts': duplicate_attempts,
-                    'records_with_duplicates': len(records_with_duplicates),
+                    'records_with_duplicates': records_with_duplicates,
                     'error_scans': error_scans,
                     'total_amount': total_amount,
                     'avg_verification_duration': avg_verification_duration,
                     'manual_entry_count': manual_entry_count,
                 },
-                # Totaux globaux (all-time) pour correspondre à l'application mobile
-                'all_time_stats': {
-                    'total_scans': all_time_total,
-                    'successful_scans': all_time_done,
-                    'processed_scans': all_time_processed,
-                    'duplicate_attempts': all_time_duplicates,
-                    'records_with_duplicates': len(all_time_records_with_dup),
-                    'error_scans': all_time_error,
-                    'total_amount': all_time_amount,
-                    'avg_verification_duration': all_time_avg_duration,
-                    'manual_entry_count': all_time_manual,
-                },
                 'recent_scans': recent_scans_data,
                 'top_suppliers': top_suppliers,
                 'chart_data': {
@@ -1036,6 +1264,23 @@ class InvoiceScanRecord(models.Model):
                     'verified': chart_verified,
                 },
             }
+
+            # === TOTAUX GLOBAUX (ALL-TIME) pour correspondre à l'application mobile ===
+            if include_all_time:
+                all_time_totals = self._get_dashboard_totals(base_domain)
+                result['all_time_stats'] = {
+                    # Total scans = Réussis + Doublons + Erreurs
+                    'total_scans': all_time_totals['successful'] + all_time_totals['duplicates'] + all_time_totals['error'],
+                    'successful_scans': all_time_totals['successful'],
+                    'processed_scans': all_time_totals['processed'],
+                    'duplicate_attempts': all_time_totals['duplicates'],
+                    'records_with_duplicates': self.search_count(base_domain + [('duplicate_count', '>', 0)]),
+                    'error_scans': all_time_totals['error'],
+                    'total_amount': all_time_totals['amount'],
+                    'avg_verification_duration': self._get_avg_verification_duration(base_domain),
+                    'manual_entry_count': self.search_count(base_domain + [('is_manual_entry', '=', True)]),
+                }
+            return result
         except Exception as e:
             _logger.error(f"Erreur get_dashboard_stats: {e}")
             # Retourner des données vides en cas d'erreur
@@ -1051,6 +1296,7 @@ class InvoiceScanRecord(models.Model):
                 'manual_entry_count': 0,
             }
             return {
+                'error': True,
                 'stats': empty_stats,
                 'all_time_stats': empty_stats,
                 'recent_scans': [],
@@ -1059,7 +1305,9 @@ class InvoiceScanRecord(models.Model):
             }
 
     @api.model
-    def get_verificateur_dashboard_data(self, period='month', date_start=None, date_end=None):
+    @cached_dashboard
+    def get_verificateur_dashboard_data(self, period='month', date_start=None, date_end=None,
+                                        include_all_time=True):
         """Récupérer les données pour le tableau de bord du Vérificateur.
         
         Le vérificateur voit ses propres scans, ses doublons détectés et ses factures créées.
@@ -1068,6 +1316,8 @@ class InvoiceScanRecord(models.Model):
             period: Période d'analyse ('day', 'week', 'month', 'year', 'custom')
             date_start: Date de début (format ISO) pour période personnalisée
             date_end: Date de fin (format ISO) pour période personnalisée
+            include_all_time: Calculer aussi les totaux globaux (cf.
+                `get_dashboard_stats`)
             
         Returns:
             dict: Données du dashboard vérificateur
@@ -1098,21 +1348,21 @@ class InvoiceScanRecord(models.Model):
             
             base_domain = [('company_id', '=', company_id), ('scanned_by', '=', user_id)]
             date_from_dt = datetime.combine(date_from, datetime.min.time())
-            date_to_dt = datetime.combine(date_to, datetime.max.time())
+            # Borne haute exclusive : minuit du lendemain (intervalle semi-ouvert)
+            date_to_dt = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
             period_domain = base_domain + [
-                ('scan_date', '>=', fields.Datetime.to_string(date_from_dt)),
-                ('scan_date', '<=', fields.Datetime.to_string(date_to_dt)),
+                ('scan_date', '>=', date_from_dt),
+                ('scan_date', '<', date_to_dt),
             ]
             
-            # Statistiques période
-            total_scans_period = self.search_count(period_domain)
-            successful_scans = self.search_count(period_domain + [('state', 'in', ['done', 'processed'])])
-            error_scans = self.search_count(period_domain + [('state', '=', 'error')])
-            
-            # Doublons détectés par ce vérificateur
-            records_with_dup = self.search(period_domain + [('duplicate_count', '>', 0)])
-            duplicate_attempts = sum(r.duplicate_count for r in records_with_dup)
-            
+            # Statistiques période (une requête GROUP BY state), doublons
+            # détectés par ce vérificateur compris
+            totals = self._get_dashboard_totals(period_domain)
+            successful_scans = totals['successful']
+            error_scans = totals['error']
+            duplicate_attempts = totals['duplicates']
+            total_amount = totals['amount']
+
             # Doublons signalés par d'autres (ce vérificateur a scanné l'original)
             last_dup_by_others = self.search_count(period_domain + [
                 ('last_duplicate_user_id', '!=', user_id),
@@ -1120,30 +1370,21 @@ class InvoiceScanRecord(models.Model):
             ])
             
             total_scans = successful_scans + duplicate_attempts + error_scans
-            
-            # Montant total
-            successful_records = self.search(period_domain + [('state', 'in', ['done', 'processed'])])
-            total_amount = sum(r.amount_ttc for r in successful_records)
-            
-            # Stats globales (all-time)
-            all_time_successful = self.search_count(base_domain + [('state', 'in', ['done', 'processed'])])
-            all_time_error = self.search_count(base_domain + [('state', '=', 'error')])
-            all_time_dup_records = self.search(base_domain + [('duplicate_count', '>', 0)])
-            all_time_duplicates = sum(r.duplicate_count for r in all_time_dup_records)
-            all_time_total = all_time_successful + all_time_duplicates + all_time_error
-            all_time_records = self.search(base_domain + [('state', 'in', ['done', 'processed'])])
-            all_time_amount = sum(r.amount_ttc for r in all_time_records)
-            
+
             # Scans récents (5 derniers)
-            recent_scans = self.search(base_domain, limit=5, order='create_date desc')
+            recent_scans = self.search_read(
+                base_domain,
+                ['reference', 'supplier_name', 'amount_ttc', 'state', 'duplicate_count', 'scan_date'],
+                limit=5, order='create_date desc',
+            )
             recent_scans_data = [{
-                'id': r.id,
-                'reference': r.reference or '',
-                'nom_fournisseur': r.supplier_name or 'N/A',
-                'montant_ttc': r.amount_ttc or 0,
-                'state': r.state,
-                'duplicate_count': r.duplicate_count,
-                'scan_date': r.scan_date.isoformat() if r.scan_date else None,
+                'id': r['id'],
+                'reference': r['reference'] or '',
+                'nom_fournisseur': r['supplier_name'] or 'N/A',
+                'montant_ttc': r['amount_ttc'] or 0,
+                'state': r['state'],
+                'duplicate_count': r['duplicate_count'],
+                'scan_date': r['scan_date'].isoformat() if r['scan_date'] else None,
             } for r in recent_scans]
             
             # Graphique évolution
@@ -1152,51 +1393,43 @@ class InvoiceScanRecord(models.Model):
             chart_duplicates = []
             
             if period in ('week', 'month', 'custom'):
+                day_successful = {}
+                day_duplicates = {}
+                for day, state, count, duplicates in self._read_group_by_day(
+                    period_domain, 'scan_date', ['state'], ['__count', 'duplicate_count:sum'],
+                ):
+                    if state in ('done', 'processed'):
+                        day_successful[day] = day_successful.get(day, 0) + count
+                    day_duplicates[day] = day_duplicates.get(day, 0) + (duplicates or 0)
+
                 days = (date_to - date_from).days
                 for i in range(days, -1, -1):
                     day = date_to - timedelta(days=i)
-                    day_start = datetime.combine(day, datetime.min.time())
-                    day_end = datetime.combine(day, datetime.max.time())
-                    day_domain = base_domain + [
-                        ('scan_date', '>=', fields.Datetime.to_string(day_start)),
-                        ('scan_date', '<=', fields.Datetime.to_string(day_end)),
-                    ]
-                    day_total = self.search_count(day_domain + [('state', 'in', ['done', 'processed'])])
-                    day_dup_records = self.search(day_domain + [('duplicate_count', '>', 0)])
-                    day_dup = sum(r.duplicate_count for r in day_dup_records)
                     chart_labels.append(day.strftime('%d/%m'))
-                    chart_scans.append(day_total)
-                    chart_duplicates.append(day_dup)
+                    chart_scans.append(day_successful.get(day, 0))
+                    chart_duplicates.append(day_duplicates.get(day, 0))
             
             # Top fournisseurs scannés par ce vérificateur
             top_suppliers = []
             try:
                 self.env.cr.execute("""
-                    SELECT supplier_name, COUNT(*) as scan_count, SUM(amount_ttc) as total_amount
+                    SELECT supplier_name AS name, COUNT(*) AS count,
+                           COALESCE(SUM(amount_ttc), 0) AS amount
                     FROM invoice_scan_record
                     WHERE company_id = %s AND scanned_by = %s
                     AND supplier_name IS NOT NULL AND supplier_name != ''
-                    AND scan_date >= %s AND scan_date <= %s
-                    GROUP BY supplier_name ORDER BY scan_count DESC LIMIT 5
-                """, (company_id, user_id, fields.Datetime.to_string(date_from_dt), fields.Datetime.to_string(date_to_dt)))
-                top_suppliers = [{
-                    'name': row[0] or 'Non défini',
-                    'count': row[1],
-                    'amount': row[2] or 0,
-                } for row in self.env.cr.fetchall()]
+                    AND scan_date >= %s AND scan_date < %s
+                    GROUP BY supplier_name ORDER BY count DESC LIMIT 5
+                """, (company_id, user_id, date_from_dt, date_to_dt))
+                top_suppliers = self.env.cr.dictfetchall()
             except Exception as e:
                 _logger.warning(f"Erreur top suppliers vérificateur: {e}")
             
             # Durée moyenne de vérification (période)
-            verif_dur_records = self.search(period_domain + [('verification_duration', '>', 0), ('state', 'in', ['done', 'processed'])])
-            avg_verification_duration = round(sum(r.verification_duration for r in verif_dur_records) / len(verif_dur_records), 1) if verif_dur_records else 0
+            avg_verification_duration = self._get_avg_verification_duration(period_domain)
             manual_entry_count = self.search_count(period_domain + [('is_manual_entry', '=', True)])
             
-            # Durée moyenne globale
-            all_time_dur = self.search(base_domain + [('verification_duration', '>', 0), ('state', 'in', ['done', 'processed'])])
-            all_time_avg_dur = round(sum(r.verification_duration for r in all_time_dur) / len(all_time_dur), 1) if all_time_dur else 0
-            
-            return {
+            result = {
                 'stats': {
                     'total_scans': total_scans,
                     'successful_scans': successful_scans,
@@ -1207,15 +1440,6 @@ class InvoiceScanRecord(models.Model):
                     'avg_verification_duration': avg_verification_duration,
                     'manual_entry_count': manual_entry_count,
                 },
-                'all_time_stats': {
-                    'total_scans': all_time_total,
-                    'successful_scans': all_time_successful,
-                    'duplicate_attempts': all_time_duplicates,
-                    'error_scans': all_time_error,
-                    'total_amount': all_time_amount,
-                    'avg_verification_duration': all_time_avg_dur,
-                    'manual_entry_count': self.search_count(base_domain + [('is_manual_entry', '=', True)]),
-                },
                 'recent_scans': recent_scans_data,
                 'top_suppliers': top_suppliers,
                 'chart_data': {
@@ -1224,15 +1448,30 @@ class InvoiceScanRecord(models.Model):
                     'duplicates': chart_duplicates,
                 },
             }
+
+            # Stats globales (all-time)
+            if include_all_time:
+                all_time_totals = self._get_dashboard_totals(base_domain)
+                result['all_time_stats'] = {
+                    'total_scans': all_time_totals['successful'] + all_time_totals['duplicates'] + all_time_totals['error'],
+                    'successful_scans': all_time_totals['successful'],
+                    'duplicate_attempts': all_time_totals['duplicates'],
+                    'error_scans': all_time_totals['error'],
+                    'total_amount': all_time_totals['amount'],
+                    'avg_verification_duration': self._get_avg_verification_duration(base_domain),
+                    'manual_entry_count': self.search_count(base_domain + [('is_manual_entry', '=', True)]),
+                }
+            return result
         except Exception as e:
             _logger.error(f"Erreur get_verificateur_dashboard_data: {e}")
             empty = {'total_scans': 0, 'successful_scans': 0, 'duplicate_attempts': 0,
                      'duplicates_by_others': 0, 'error_scans': 0, 'total_amount': 0,
                      'avg_verification_duration': 0, 'manual_entry_count': 0}
-            return {'stats': empty, 'all_time_stats': empty, 'recent_scans': [],
+            return {'error': True, 'stats': empty, 'all_time_stats': empty, 'recent_scans': [],
                     'top_suppliers': [], 'chart_data': {'labels': [], 'scans': [], 'duplicates': []}}
 
     @api.model
+    @cached_dashboard
     def get_traiteur_dashboard_data(self, period='month', date_start=None, date_end=None):
         """Récupérer les données pour le tableau de bord du Traiteur.
         
@@ -1271,7 +1510,8 @@ class InvoiceScanRecord(models.Model):
                 date_to = today
             
             date_from_dt = datetime.combine(date_from, datetime.min.time())
-            date_to_dt = datetime.combine(date_to, datetime.max.time())
+            # Borne haute exclusive : minuit du lendemain (intervalle semi-ouvert)
+            date_to_dt = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
             
             # Factures en attente de traitement (état 'done', non encore traitées)
             pending_domain = [
@@ -1279,21 +1519,27 @@ class InvoiceScanRecord(models.Model):
                 ('state', '=', 'done'),
                 ('processed_by', '=', False),
             ]
-            pending_count = self.search_count(pending_domain)
-            pending_records = self.search(pending_domain)
-            pending_amount = sum(r.amount_ttc for r in pending_records)
             
             # Factures traitées par ce traiteur (période)
             my_processed_domain = [
                 ('company_id', '=', company_id),
                 ('processed_by', '=', user_id),
                 ('state', '=', 'processed'),
-                ('processed_date', '>=', fields.Datetime.to_string(date_from_dt)),
-                ('processed_date', '<=', fields.Datetime.to_string(date_to_dt)),
+                ('processed_date', '>=', date_from_dt),
+                ('processed_date', '<', date_to_dt),
             ]
-            processed_period = self.search_count(my_processed_domain)
-            processed_records_period = self.search(my_processed_domain)
-            processed_amount_period = sum(r.amount_ttc for r in processed_records_period)
+            
+            # En attente et traitées sur la période : un seul agrégat groupé
+            # par état ('done' = en attente, 'processed' = traitées par moi)
+            eligible_totals = {
+                state: (count, amount)
+                for state, count, amount in self._read_group(
+                    expression.OR([pending_domain, my_processed_domain]),
+                    ['state'], ['__count', 'amount_ttc:sum'],
+                )
+            }
+            pending_count, pending_amount = eligible_totals.get('done', (0, 0))
+            processed_period, processed_amount_period = eligible_totals.get('processed', (0, 0))
             
             # Factures traitées par ce traiteur (all-time)
             my_processed_all = [
@@ -1301,16 +1547,15 @@ class InvoiceScanRecord(models.Model):
                 ('processed_by', '=', user_id),
                 ('state', '=', 'processed'),
             ]
-            processed_all_time = self.search_count(my_processed_all)
-            processed_all_records = self.search(my_processed_all)
-            processed_all_amount = sum(r.amount_ttc for r in processed_all_records)
+            [(processed_all_time, processed_all_amount)] = self._read_group(
+                my_processed_all, [], ['__count', 'amount_ttc:sum'])
             
             # Total traités par tous les traiteurs (période) 
             all_processed_domain = [
                 ('company_id', '=', company_id),
                 ('state', '=', 'processed'),
-                ('processed_date', '>=', fields.Datetime.to_string(date_from_dt)),
-                ('processed_date', '<=', fields.Datetime.to_string(date_to_dt)),
+                ('processed_date', '>=', date_from_dt),
+                ('processed_date', '<', date_to_dt),
             ]
             all_processed_period = self.search_count(all_processed_domain)
             
@@ -1319,91 +1564,66 @@ class InvoiceScanRecord(models.Model):
             processing_rate = round((processed_period / total_eligible * 100) if total_eligible > 0 else 0, 1)
             
             # Scans récemment traités par moi (5 derniers)
-            recent_processed = self.search(my_processed_all, limit=5, order='processed_date desc')
+            # search_read, comme les autres tableaux de bord : seules les
+            # colonnes affichées sont lues et les noms d'utilisateurs sont
+            # résolus en un lot
+            recent_processed = self.search_read(
+                my_processed_all,
+                ['reference', 'supplier_name', 'amount_ttc', 'state', 'processed_date', 'scanned_by'],
+                limit=5, order='processed_date desc',
+            )
             recent_processed_data = [{
-                'id': r.id,
-                'reference': r.reference or '',
-                'nom_fournisseur': r.supplier_name or 'N/A',
-                'montant_ttc': r.amount_ttc or 0,
-                'state': r.state,
-                'processed_date': r.processed_date.isoformat() if r.processed_date else None,
-                'scanned_by_name': r.scanned_by.name if r.scanned_by else '',
+                'id': r['id'],
+                'reference': r['reference'] or '',
+                'nom_fournisseur': r['supplier_name'] or 'N/A',
+                'montant_ttc': r['amount_ttc'] or 0,
+                'state': r['state'],
+                'processed_date': r['processed_date'].isoformat() if r['processed_date'] else None,
+                'scanned_by_name': r['scanned_by'][1] if r['scanned_by'] else '',
             } for r in recent_processed]
             
             # Scans en attente (5 derniers)
-            pending_scans = self.search(pending_domain, limit=5, order='scan_date desc')
+            pending_scans = self.search_read(
+                pending_domain,
+                ['reference', 'supplier_name', 'amount_ttc', 'state', 'scan_date', 'scanned_by'],
+                limit=5, order='scan_date desc',
+            )
             pending_scans_data = [{
-                'id': r.id,
-                'reference': r.reference or '',
-                'nom_fournisseur': r.supplier_name or 'N/A',
-                'montant_ttc': r.amount_ttc or 0,
-                'state': r.state,
-                'scan_date': r.scan_date.isoformat() if r.scan_date else None,
-                'scanned_by_name': r.scanned_by.name if r.scanned_by else '',
-            } for r in pending_scans]    
+                'id': r['id'],
+                'reference': r['reference'] or '',
+                'nom_fournisseur': r['supplier_name'] or 'N/A',
+                'montant_ttc': r['amount_ttc'] or 0,
+                'state': r['state'],
+                'scan_date': r['scan_date'].isoformat() if r['scan_date'] else None,
+                'scanned_by_name': r['scanned_by'][1] if r['scanned_by'] else '',
+            } for r in pending_scans]
             
             # Graphique évolution traitement
             chart_labels = []
             chart_processed = []
-            chart_pending = []
             
             if period in ('week', 'month', 'custom'):
+                # my_processed_domain couvre exactement la plage affichée
+                day_counts = dict(self._read_group_by_day(my_processed_domain, 'processed_date'))
                 days = (date_to - date_from).days
                 for i in range(days, -1, -1):
                     day = date_to - timedelta(days=i)
-                    day_start = datetime.combine(day, datetime.min.time())
-                    day_end = datetime.combine(day, datetime.max.time())
-                    
-                    day_processed = self.search_count([
-                        ('company_id', '=', company_id),
-                        ('processed_by', '=', user_id),
-                        ('state', '=', 'processed'),
-                        ('processed_date', '>=', fields.Datetime.to_string(day_start)),
-                        ('processed_date', '<=', fields.Datetime.to_string(day_end)),
-                    ])
-                    
                     chart_labels.append(day.strftime('%d/%m'))
-                    chart_processed.append(day_processed)
+                    chart_processed.append(day_counts.get(day, 0))
             
             # Durée moyenne de vérification (globale, car traiteur ne scanne pas)
-            all_dur_records = self.search([
+            avg_verification_duration = self._get_avg_verification_duration([
                 ('company_id', '=', company_id),
-                ('verification_duration', '>', 0),
-                ('state', 'in', ['done', 'processed']),
             ])
-            avg_verification_duration = round(sum(r.verification_duration for r in all_dur_records) / len(all_dur_records), 1) if all_dur_records else 0
             manual_entry_count = self.search_count([
                 ('company_id', '=', company_id),
                 ('is_manual_entry', '=', True),
             ])
             
-            return {
-                'stats': {
-                    'pending_count': pending_count,
-                    'pending_amount': pending_amount,
-                    'processed_period': processed_period,
-                    'processed_amount_period': processed_amount_period,
-                    'all_processed_period': all_processed_period,
-                    'processing_rate': processing_rate,
-                    'avg_verification_duration': avg_verification_duration,
-                    'manual_entry_count': manual_entry_count,
-                },
-                'all_time_stats': {
-                    'processed_all_time': processed_all_time,
-                    'processed_all_amount': processed_all_amount,
-                    'avg_verification_duration': avg_verification_duration,
-                    'manual_entry_count': manual_entry_count,
-                },
-                'recent_processed': recent_processed_data,
-                'pending_scans': pending_scans_data,
-                'chart_data': {
-                    'labels': chart_labels,
-                    'processed': chart_processed,
-                },
-            }
         except Exception as e:
             _logger.error(f"Erreur get_traiteur_dashboard_data: {e}")
             return {
+                'error': True,
                 'stats': {'pending_count': 0, 'pending_amount': 0, 'processed_period': 0,
                           'processed_amount_period': 0, 'all_processed_period': 0, 'processing_rate': 0,
                           'avg_verification_duration': 0, 'manual_entry_count': 0},
@@ -1411,4 +1631,29 @@ class InvoiceScanRecord(models.Model):
                                    'avg_verification_duration': 0, 'manual_entry_count': 0},
                 'recent_processed': [], 'pending_scans': [],
                 'chart_data': {'labels': [], 'processed': []},
-            }
\ No newline at end of file
+            }
+        
+        return {
+            'stats': {
+                'pending_count': pending_count,
+                'pending_amount': pending_amount or 0,
+                'processed_period': processed_period,
+                'processed_amount_period': processed_amount_period or 0,
+                'all_processed_period': all_processed_period,
+                'processing_rate': processing_rate,
+                'avg_verification_duration': avg_verification_duration,
+                'manual_entry_count': manual_entry_count,
+            },
+            'all_time_stats': {
+                'processed_all_time': processed_all_time,
+                'processed_all_amount': processed_all_amount or 0,
+                'avg_verification_duration': avg_verification_duration,
+                'manual_entry_count': manual_entry_count,
+            },
+            'recent_processed': recent_processed_data,
+            'pending_scans': pending_scans_data,
+            'chart_data': {
+                'labels': chart_labels,
+                'processed': chart_processed,
+            },
+        }
\ No newline at end of file
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Cache mémoire à courte durée de vie des lectures répétées : endpoints de
+l'API et tableaux de bord.
+
+L'application mobile rappelle /history et /stats avec les mêmes paramètres à
+chaque retour sur l'écran d'accueil. Les données servies sont mises en cache
+quelques dizaines de secondes, par base / société / utilisateur /
+paramètres. Les tableaux de bord du backend passent par le même cache (cf.
+`invoice_scan_record.cached_dashboard`). Module sans dépendance Odoo, placé
+dans `models/` : les modèles l'invalident, les contrôleurs le lisent.
+
+Fonctionne par worker Odoo (dictionnaire protégé par un verrou) :
+- En mode multi-worker (prefork), chaque worker a son propre cache
+- L'invalidation après un scan n'est donc que locale : les autres workers
+  resservent au plus TTL secondes de données anciennes. Les TTL doivent
+  rester courts pour cette raison.
+- L'invalidation passe par un numéro de génération par société, inclus
+  dans la clé : les anciennes entrées ne sont plus jamais lues et sont
+  purgées à l'expiration.
+- Un worker sert plusieurs bases, où les mêmes ids de société et
+  d'utilisateur désignent des enregistrements différents : la base fait
+  partie de la clé des entrées comme de celle des générations.
+"""
+
+import threading
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# ==================== CONFIGURATION ====================
+
+# Durées de vie par endpoint (secondes)
+HISTORY_CACHE_TTL = 30
+STATS_CACHE_TTL = 45
+DASHBOARD_CACHE_TTL = 60
+
+# Nombre max d'entrées par worker ; au-delà, purge des entrées expirées
+# puis vidage complet si nécessaire (pas de LRU, volontairement simple)
+MAX_CACHE_ENTRIES = 1024
+
+# ==================== CACHE GLOBAL ====================
+
+_cache_lock = threading.Lock()
+_cache = {}          # clé -> (expire_à, données)
+_generations = {}    # (dbname, company_id) -> génération courante
+_hits = 0
+_misses = 0
+
+
+def _full_key(dbname, endpoint, company_id, key):
+    return (dbname, endpoint, company_id, _generations.get((dbname, company_id), 0), key)
+
+
+def get_cached(dbname, endpoint, company_id, key):
+    """Retourner les données en cache, ou None si absentes/expirées."""
+    global _hits, _misses
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(_full_key(dbname, endpoint, company_id, key))
+        if entry and entry[0] > now:
+            _hits += 1
+            return entry[1]
+        _misses += 1
+        return None
+
+
+def set_cached(dbname, endpoint, company_id, key, data, ttl):
+    """Stocker `data` pour `ttl` secondes.
+
+    `data` est le dictionnaire passé à api_response : il ne doit plus être
+    modifié par l'appelant après mise en cache.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        if len(_cache) >= MAX_CACHE_ENTRIES:
+            for k in [k for k, (expires, _data) in _cache.items() if expires <= now]:
+                del _cache[k]
+            if len(_cache) >= MAX_CACHE_ENTRIES:
+                _logger.debug("Cache réponses plein (%d entrées) : vidage", len(_cache))
+                _cache.clear()
+        _cache[_full_key(dbname, endpoint, company_id, key)] = (now + ttl, data)
+
+
+def invalidate_company(dbname, company_id):
+    """Invalider toutes les entrées d'une société de la base (dans ce worker)."""
+    with _cache_lock:
+        _generations[dbname, company_id] = _generations.get((dbname, company_id), 0) + 1
+
+
+def get_cache_status():
+    """Retourner l'état du cache pour le monitoring."""
+    with _cache_lock:
+        return {
+            'entries': len(_cache),
+            'max_entries': MAX_CACHE_ENTRIES,
+            'hits': _hits,
+            'misses': _misses,
+        }
@@ -0,0 +1,76 @@
+/** @odoo-module **/
+
+import { Component } from "@odoo/owl";
+import { loadJS } from "@web/core/assets";
+
+/**
+ * Code commun aux trois tableaux de bord (Responsable, Vérificateur, Traiteur).
+ *
+ * Chargé en tête du bundle `invoice_qr_scanner.assets_dashboards` : les
+ * dashboards héritent de `ScannerDashboardBase` au lieu de dupliquer les
+ * handlers de période et les formateurs.
+ */
+
+export const CHART_JS_URL = "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js";
+
+export function loadChartJs() {
+    return loadJS(CHART_JS_URL);
+}
+
+export function formatNumber(value) {
+    return new Intl.NumberFormat("fr-FR").format(value || 0);
+}
+
+export function formatCurrency(value) {
+    return formatNumber(value) + " FCFA";
+}
+
+export function formatDuration(seconds) {
+    if (!seconds || seconds <= 0) return "0s";
+    if (seconds < 60) return seconds.toFixed(1) + "s";
+    const mins = Math.floor(seconds / 60);
+    const secs = (seconds % 60).toFixed(0);
+    return mins + "min " + secs + "s";
+}
+
+/**
+ * Base des tableaux de bord : sélection de période et formateurs.
+ * Les sous-classes fournissent `this.state` (period, date_start, date_end)
+ * et `loadDashboardData()`.
+ */
+export class ScannerDashboardBase extends Component {
+    static props = ["*"];
+
+    onPeriodChange(ev) {
+        this.state.period = ev.target.value;
+        if (this.state.period !== "custom") {
+            this.loadDashboardData();
+        }
+    }
+
+    onDateStartChange(ev) {
+        this.state.date_start = ev.target.value;
+        if (this.state.date_start && this.state.date_end) {
+            this.loadDashboardData();
+        }
+    }
+
+    onDateEndChange(ev) {
+        this.state.date_end = ev.target.value;
+        if (this.state.date_start && this.state.date_end) {
+            this.loadDashboardData();
+        }
+    }
+
+    formatNumber(value) {
+        return formatNumber(value);
+    }
+
+    formatCurrency(value) {
+        return formatCurrency(value);
+    }
+
+    formatDuration(seconds) {
+        return formatDuration(seconds);
+    }
+}
@@ -0,0 +1,31 @@
+/** @odoo-module **/
+
+import { Component, xml } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { LazyComponent } from "@web/core/assets";
+
+/**
+ * Chargement à la demande des tableaux de bord.
+ *
+ * Les trois tableaux de bord (Responsable, Vérificateur, Traiteur) et leurs
+ * templates/CSS vivent dans le bundle `invoice_qr_scanner.assets_dashboards`,
+ * qui n'est téléchargé qu'à la première ouverture d'un tableau de bord.
+ * Seuls ces petits wrappers restent dans `web.assets_backend` : ils
+ * enregistrent les tags des client actions et délèguent à LazyComponent.
+ */
+const DASHBOARDS_BUNDLE = "invoice_qr_scanner.assets_dashboards";
+
+function lazyDashboard(componentName) {
+    return class extends Component {
+        static components = { LazyComponent };
+        static template = xml`
+            <LazyComponent bundle="'${DASHBOARDS_BUNDLE}'" Component="'${componentName}'" props="props"/>
+        `;
+        static props = ["*"];
+    };
+}
+
+const actions = registry.category("actions");
+actions.add("invoice_scanner_dashboard_improved", lazyDashboard("InvoiceScannerDashboardImproved"));
+actions.add("verificateur_dashboard", lazyDashboard("VerificateurDashboard"));
+actions.add("traiteur_dashboard", lazyDashboard("TraiteurDashboard"));
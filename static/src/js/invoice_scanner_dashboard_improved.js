@@ -1,13 +1,12 @@
 /** @odoo-module **/
 
-import { Component, useState, onMounted } from "@odoo/owl";
+import { useState, onMounted } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { loadJS } from "@web/core/assets";
+import { ScannerDashboardBase, loadChartJs } from "@invoice_qr_scanner/js/dashboard_common";
 
-export class InvoiceScannerDashboardImproved extends Component {
+export class InvoiceScannerDashboardImproved extends ScannerDashboardBase {
     static template = "invoice_qr_scanner.DashboardImproved";
-    static props = ["*"];
 
     setup() {
         this.orm = useService("orm");
@@ -47,10 +46,11 @@ export class InvoiceScannerDashboardImproved extends Component {
         });
         
         this.evolutionChart = null;
+        this.allTimeLoaded = false;
         this.statusChart = null;
 
         onMounted(async () => {
-            await loadJS("https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js");
+            await loadChartJs();
             await this.loadDashboardData();
         });
     }
@@ -66,11 +66,15 @@ export class InvoiceScannerDashboardImproved extends Component {
                     this.state.period === "custom" ? this.state.date_start : null,
                     this.state.period === "custom" ? this.state.date_end : null,
                     this.state.period,
+                    // Totaux globaux : au premier chargement seulement, ils ne
+                    // dépendent pas de la période sélectionnée
+                    !this.allTimeLoaded,
                 ]
             );
             
             this.state.stats = result.stats || this.state.stats;
             this.state.all_time_stats = result.all_time_stats || this.state.all_time_stats;
+            this.allTimeLoaded = this.allTimeLoaded || Boolean(result.all_time_stats);
             this.state.recent_scans = result.recent_scans || [];
             this.state.top_suppliers = result.top_suppliers || [];
             this.state.chart_data = result.chart_data || this.state.chart_data;
@@ -122,27 +126,6 @@ export class InvoiceScannerDashboardImproved extends Component {
         };
     }
 
-    onPeriodChange(ev) {
-        this.state.period = ev.target.value;
-        if (this.state.period !== "custom") {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateStartChange(ev) {
-        this.state.date_start = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateEndChange(ev) {
-        this.state.date_end = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
     renderCharts() {
         this.renderEvolutionChart();
         this.renderStatusChart();
@@ -243,24 +226,6 @@ export class InvoiceScannerDashboardImproved extends Component {
         });
     }
 
-    formatNumber(value) {
-        if (!value && value !== 0) return "0";
-        return new Intl.NumberFormat("fr-FR").format(value);
-    }
-
-    formatCurrency(value) {
-        if (!value && value !== 0) return "0 FCFA";
-        return new Intl.NumberFormat("fr-FR").format(value) + " FCFA";
-    }
-
-    formatDuration(seconds) {
-        if (!seconds) return "0s";
-        if (seconds < 60) return seconds.toFixed(1) + "s";
-        const mins = Math.floor(seconds / 60);
-        const secs = (seconds % 60).toFixed(0);
-        return mins + "m " + secs + "s";
-    }
-
     truncate(text, length) {
         if (!text) return "-";
         return text.length > length ? text.substring(0, length) + "..." : text;
@@ -474,4 +439,4 @@ export class InvoiceScannerDashboardImproved extends Component {
     }
 }
 
-registry.category("actions").add("invoice_scanner_dashboard_improved", InvoiceScannerDashboardImproved);
+registry.category("lazy_components").add("InvoiceScannerDashboardImproved", InvoiceScannerDashboardImproved);
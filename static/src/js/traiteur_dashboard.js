@@ -1,13 +1,12 @@
 /** @odoo-module **/
 
-import { Component, useState, onMounted, onWillUnmount, useRef } from "@odoo/owl";
+import { useState, onMounted, onWillUnmount, useRef } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { loadJS } from "@web/core/assets";
+import { ScannerDashboardBase, loadChartJs } from "@invoice_qr_scanner/js/dashboard_common";
 
-export class TraiteurDashboard extends Component {
+export class TraiteurDashboard extends ScannerDashboardBase {
     static template = "invoice_qr_scanner.TraiteurDashboard";
-    static props = ["*"];
 
     setup() {
         this.orm = useService("orm");
@@ -44,7 +43,7 @@ export class TraiteurDashboard extends Component {
         this.evolutionChart = null;
 
         onMounted(async () => {
-            await loadJS("https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js");
+            await loadChartJs();
             await this.loadDashboardData();
         });
 
@@ -121,43 +120,6 @@ export class TraiteurDashboard extends Component {
         });
     }
 
-    onPeriodChange(ev) {
-        this.state.period = ev.target.value;
-        if (this.state.period !== "custom") {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateStartChange(ev) {
-        this.state.date_start = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateEndChange(ev) {
-        this.state.date_end = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
-    formatNumber(value) {
-        return (value || 0).toLocaleString('fr-FR');
-    }
-
-    formatCurrency(value) {
-        return (value || 0).toLocaleString('fr-FR') + ' FCFA';
-    }
-
-    formatDuration(seconds) {
-        if (!seconds || seconds <= 0) return '0s';
-        if (seconds < 60) return seconds.toFixed(1) + 's';
-        const mins = Math.floor(seconds / 60);
-        const secs = (seconds % 60).toFixed(0);
-        return mins + 'min ' + secs + 's';
-    }
-
     formatDate(isoDate) {
         if (!isoDate) return 'N/A';
         try {
@@ -206,4 +168,4 @@ export class TraiteurDashboard extends Component {
     }
 }
 
-registry.category("actions").add("traiteur_dashboard", TraiteurDashboard);
+registry.category("lazy_components").add("TraiteurDashboard", TraiteurDashboard);
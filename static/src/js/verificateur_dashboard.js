@@ -1,13 +1,12 @@
 /** @odoo-module **/
 
-import { Component, useState, onMounted, onWillUnmount, useRef } from "@odoo/owl";
+import { useState, onMounted, onWillUnmount, useRef } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
-import { loadJS } from "@web/core/assets";
+import { ScannerDashboardBase, loadChartJs } from "@invoice_qr_scanner/js/dashboard_common";
 
-export class VerificateurDashboard extends Component {
+export class VerificateurDashboard extends ScannerDashboardBase {
     static template = "invoice_qr_scanner.VerificateurDashboard";
-    static props = ["*"];
 
     setup() {
         this.orm = useService("orm");
@@ -45,9 +44,10 @@ export class VerificateurDashboard extends Component {
         });
         
         this.evolutionChart = null;
+        this.allTimeLoaded = false;
 
         onMounted(async () => {
-            await loadJS("https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js");
+            await loadChartJs();
             await this.loadDashboardData();
         });
 
@@ -69,10 +69,14 @@ export class VerificateurDashboard extends Component {
                     this.state.period,
                     this.state.period === "custom" ? this.state.date_start : null,
                     this.state.period === "custom" ? this.state.date_end : null,
+                    // Totaux globaux : au premier chargement seulement, ils ne
+                    // dépendent pas de la période sélectionnée
+                    !this.allTimeLoaded,
                 ]
             );
             this.state.stats = result.stats || this.state.stats;
             this.state.all_time_stats = result.all_time_stats || this.state.all_time_stats;
+            this.allTimeLoaded = this.allTimeLoaded || Boolean(result.all_time_stats);
             this.state.recent_scans = result.recent_scans || [];
             this.state.top_suppliers = result.top_suppliers || [];
             this.state.chart_data = result.chart_data || this.state.chart_data;
@@ -132,43 +136,6 @@ export class VerificateurDashboard extends Component {
         });
     }
 
-    onPeriodChange(ev) {
-        this.state.period = ev.target.value;
-        if (this.state.period !== "custom") {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateStartChange(ev) {
-        this.state.date_start = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
-    onDateEndChange(ev) {
-        this.state.date_end = ev.target.value;
-        if (this.state.date_start && this.state.date_end) {
-            this.loadDashboardData();
-        }
-    }
-
-    formatNumber(value) {
-        return (value || 0).toLocaleString('fr-FR');
-    }
-
-    formatCurrency(value) {
-        return (value || 0).toLocaleString('fr-FR') + ' FCFA';
-    }
-
-    formatDuration(seconds) {
-        if (!seconds || seconds <= 0) return '0s';
-        if (seconds < 60) return seconds.toFixed(1) + 's';
-        const mins = Math.floor(seconds / 60);
-        const secs = (seconds % 60).toFixed(0);
-        return mins + 'min ' + secs + 's';
-    }
-
     getStateClass(state) {
         const classes = {
             'done': 'badge bg-success',
@@ -230,4 +197,4 @@ export class VerificateurDashboard extends Component {
     }
 }
 
-registry.category("actions").add("verificateur_dashboard", VerificateurDashboard);
+registry.category("lazy_components").add("VerificateurDashboard", VerificateurDashboard);
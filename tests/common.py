@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Socle commun des tests du module invoice_qr_scanner
+"""
+
+# UUID de test valide et modèle d'URL de vérification DGI
+VALID_UUID = '019bd62c-467e-7000-82ac-45c8389c7f05'
+DGI_URL_TMPL = 'https://www.services.fne.dgi.gouv.ci/fr/verification/{}'
+VALID_URL = DGI_URL_TMPL.format(VALID_UUID)
+
+# Pas de suivi ni d'abonnés mail : les tests ne vérifient pas le chatter
+NO_MAIL_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_create_nosubscribe': True,
+    'mail_notrack': True,
+    'no_reset_password': True,
+}
+
+
+def get_xof_currency(env):
+    """Récupérer (ou créer) la devise XOF, active.
+
+    Odoo livre la quasi-totalité des devises INACTIVES : un `search`
+    ordinaire (active_test=True) ne les voit pas, et l'ancien code
+    enchaînait donc sur un `create` refusé par la contrainte d'unicité
+    sur `name`. La classe de tests entière échouait au setUpClass sur
+    toute base fraîche.
+
+    Pas de cache entre classes : chaque classe de tests tourne dans sa
+    propre transaction, annulée à la fin, et une devise créée par l'une
+    n'existe plus pour la suivante.
+    """
+    Currency = env['res.currency'].with_context(active_test=False)
+    currency = Currency.search([('name', '=', 'XOF')], limit=1)
+    if currency:
+        currency.active = True
+        return currency
+    return Currency.create({'name': 'XOF', 'symbol': 'FCFA', 'rounding': 1})
+
+
+class ScannerTestMixin:
+    """Fixtures partagées : contexte sans mail, devise XOF, UUID de test.
+
+    À placer avant la classe de base Odoo (`TransactionCase`, `HttpCase`) ;
+    les sous-classes n'ajoutent que leurs propres enregistrements.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, **NO_MAIL_CONTEXT))
+        cls.currency_xof = get_xof_currency(cls.env)
+        cls.valid_uuid = VALID_UUID
+        cls.valid_url = VALID_URL
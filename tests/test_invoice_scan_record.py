@@ -5,39 +5,24 @@ Tests unitaires pour le modèle invoice.scan.record
 
 from unittest.mock import patch
 
-from psycopg2 import IntegrityError
+from psycopg2.errors import UniqueViolation
 
 from odoo import fields
 from odoo.tests import TransactionCase, tagged
 from odoo.tools import mute_logger
 from odoo.exceptions import UserError
 
+from odoo.addons.invoice_qr_scanner.models import response_cache
+from odoo.addons.invoice_qr_scanner.tests.common import DGI_URL_TMPL, ScannerTestMixin
+
 
 @tagged('post_install', '-at_install', 'invoice_qr_scanner')
-class TestInvoiceScanRecord(TransactionCase):
+class TestInvoiceScanRecord(ScannerTestMixin, TransactionCase):
     """Tests pour le modèle InvoiceScanRecord."""
 
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        
-        # Récupérer la devise XOF.
-        # Odoo livre la quasi-totalité des devises INACTIVES : un `search`
-        # ordinaire (active_test=True) ne les voit pas, et l'ancien code
-        # enchaînait donc sur un `create` refusé par la contrainte d'unicité
-        # sur `name`. La classe de tests entière échouait au setUpClass sur
-        # toute base fraîche.
-        Currency = cls.env['res.currency'].with_context(active_test=False)
-        cls.currency_xof = Currency.search([('name', '=', 'XOF')], limit=1)
-        if cls.currency_xof:
-            cls.currency_xof.active = True
-        else:
-            cls.currency_xof = Currency.create({
-                'name': 'XOF',
-                'symbol': 'FCFA',
-                'rounding': 1,
-            })
-        
         # Créer un utilisateur de test
         cls.test_user = cls.env['res.users'].create({
             'name': 'Test Scanner User',
@@ -54,9 +39,6 @@ class TestInvoiceScanRecord(TransactionCase):
             'dgi_code': 'TEST123K',
         })
         
-        # UUID de test valide
-        cls.valid_uuid = '019bd62c-467e-7000-82ac-45c8389c7f05'
-        cls.valid_url = f'https://www.services.fne.dgi.gouv.ci/fr/verification/{cls.valid_uuid}'
 
     def test_create_scan_record(self):
         """Test de création d'un enregistrement de scan."""
@@ -103,7 +85,7 @@ class TestInvoiceScanRecord(TransactionCase):
     def test_uuid_uniqueness_constraint(self):
         """La contrainte SQL d'unicité (qr_uuid, company_id) est bien active.
 
-        On attend précisément une `IntegrityError` : `assertRaises(Exception)`
+        On attend précisément une `UniqueViolation` : `assertRaises(Exception)`
         aurait aussi accepté une faute de frappe ou une `AttributeError`, et
         le test serait passé au vert sans que la contrainte existe.
 
@@ -115,7 +97,7 @@ class TestInvoiceScanRecord(TransactionCase):
             'qr_url': self.valid_url,
         })
 
-        with self.assertRaises(IntegrityError), mute_logger('odoo.sql_db'):
+        with self.assertRaises(UniqueViolation), mute_logger('odoo.sql_db'):
             with self.env.cr.savepoint():
                 self.env['invoice.scan.record'].create({
                     'qr_uuid': self.valid_uuid,
@@ -251,65 +233,13 @@ class TestInvoiceScanRecord(TransactionCase):
             'state': state,
         })
 
-    def _make_posted_invoice(self):
-        """Créer et comptabiliser une facture fournisseur de test.
-
-        Volontairement SANS try/except : si la comptabilité de la base de test
-        est inutilisable, ce test doit ÉCHOUER bruyamment. L'ancienne version
-        enveloppait tout dans un `except Exception: skipTest`, ce qui
-        transformait n'importe quel échec — y compris celui de l'assertion —
-        en test ignoré.
-        """
-        journal = self.env['account.journal'].search(
-            [('type', '=', 'purchase')], limit=1)
-        account = self.env['account.account'].search(
-            [('account_type', '=', 'expense')], limit=1)
-        self.assertTrue(journal, "Base de test sans journal d'achats")
-        self.assertTrue(account, "Base de test sans compte de charge")
-
-        invoice = self.env['account.move'].create({
-            'move_type': 'in_invoice',
-            'partner_id': self.test_partner.id,
-            'journal_id': journal.id,
-            'invoice_date': fields.Date.today(),
-            'invoice_line_ids': [(0, 0, {
-                'name': 'Ligne de test',
-                'quantity': 1,
-                'price_unit': 1000,
-                'account_id': account.id,
-            })],
-        })
-        invoice.action_post()
-        self.assertEqual(invoice.state, 'posted')
-        return invoice
-
-    def test_cannot_delete_scan_with_posted_invoice(self):
-        """Un scan justifiant une facture COMPTABILISÉE ne peut être supprimé.
-
-        Axe distinct de l'état « traité » : le scan ci-dessous est en `done`,
-        donc non protégé à ce titre — c'est bien la facture comptabilisée qui
-        déclenche le refus.
-        """
-        invoice = self._make_posted_invoice()
-        record = self.env['invoice.scan.record'].create({
-            'qr_uuid': self.valid_uuid,
-            'qr_url': self.valid_url,
-            'invoice_id': invoice.id,
-            'state': 'done',
-        })
-
-        with self.assertRaises(UserError):
-            record.unlink()
-
-        self.assertTrue(record.exists())
-
     def test_can_delete_scan_with_draft_invoice(self):
         """Une facture en BROUILLON n'a pas d'existence comptable : suppression permise."""
         journal = self.env['account.journal'].search(
             [('type', '=', 'purchase')], limit=1)
         # Sur recordset vide, `journal.id` vaut False et la facture serait
         # créée sur un journal arbitraire : asserter comme le fait
-        # `_make_posted_invoice`.
+        # `TestScanRecordPostedInvoice._make_posted_invoice`.
         self.assertTrue(journal, "Base de test sans journal d'achats")
 
         invoice = self.env['account.move'].create({
@@ -402,42 +332,234 @@ class TestInvoiceScanRecord(TransactionCase):
                         "Aucun scan du lot ne doit avoir été supprimé")
         self.assertTrue(protected.exists())
 
+    def test_purchase_journal_lookup_sees_new_journal(self):
+        """Un journal d'achats créé après une première résolution est vu."""
+        ScanRecord = self.env['invoice.scan.record']
+        company_id = self.env.company.id
+        ScanRecord._get_purchase_journal_id(company_id)
+
+        # Séquence la plus basse : premier dans l'ordre des journaux
+        journal = self.env['account.journal'].create({
+            'name': 'Achats scanner',
+            'code': 'ASCN',
+            'type': 'purchase',
+            'company_id': company_id,
+            'sequence': -1,
+        })
 
-@tagged('post_install', '-at_install', 'invoice_qr_scanner')
-class TestDashboardData(TransactionCase):
-    """Tests pour les données du tableau de bord."""
+        self.assertEqual(ScanRecord._get_purchase_journal_id(company_id), journal.id)
+
+    def test_search_is_processed(self):
+        """Recherche sur `is_processed` (non stocké) : traduite sur `state`."""
+        scans = self.env['invoice.scan.record']
+        for i, state in enumerate(('draft', 'done', 'processed', 'error')):
+            scans |= self._make_scan(state=state, uuid='019bd62c-467e-7000-82ac-1000000000%02d' % i)
+        others = {'draft', 'done', 'error'}
+
+        for operator, value, expected in (
+            ('=', True, {'processed'}),
+            ('=', False, others),
+            ('!=', True, others),
+            ('!=', False, {'processed'}),
+        ):
+            with self.subTest(operator=operator, value=value):
+                found = scans.search([('id', 'in', scans.ids), ('is_processed', operator, value)])
+                self.assertEqual(set(found.mapped('state')), expected)
+
+        with self.assertRaises(UserError):
+            scans.search([('is_processed', 'in', [True])])
+
+    def test_search_is_from_qr_scan(self):
+        """Recherche sur `is_from_qr_scan` : factures liées ou non à un scan."""
+        scanned, manual = moves = self.env['account.move'].create([
+            {'move_type': 'in_invoice', 'partner_id': self.test_partner.id,
+             'qr_scan_uuid': self.valid_uuid},
+            {'move_type': 'in_invoice', 'partner_id': self.test_partner.id},
+        ])
+
+        for operator, value, expected in (
+            ('=', True, scanned),
+            ('=', False, manual),
+            ('!=', True, manual),
+            ('!=', False, scanned),
+        ):
+            with self.subTest(operator=operator, value=value):
+                found = moves.search([('id', 'in', moves.ids), ('is_from_qr_scan', operator, value)])
+                self.assertEqual(found, expected)
+
+        with self.assertRaises(UserError):
+            moves.search([('is_from_qr_scan', 'in', [True])])
+
+
+@tagged('post_install', '-at_install', 'invoice_qr_scanner', 'slow')
+class TestScanRecordPostedInvoice(ScannerTestMixin, TransactionCase):
+    """Protection des scans liés à une facture comptabilisée.
+
+    Classe à part, marquée `slow` : `action_post` (séquence, taxes, écritures)
+    domine le temps de la suite. Le contrôle rapide peut l'écarter avec
+    `--test-tags invoice_qr_scanner,-slow` ; la suite complète la garde.
+    """
 
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
-        
-        # Cf. TestInvoiceScanRecord.setUpClass : les devises Odoo sont
-        # livrées inactives, il faut donc désactiver `active_test`.
-        Currency = cls.env['res.currency'].with_context(active_test=False)
-        cls.currency_xof = Currency.search([('name', '=', 'XOF')], limit=1)
-        if cls.currency_xof:
-            cls.currency_xof.active = True
-        else:
-            cls.currency_xof = Currency.create({
-                'name': 'XOF', 'symbol': 'FCFA', 'rounding': 1,
-            })
-
-    def test_get_dashboard_data_empty(self):
-        """Dashboard sans données : zéros LÉGITIMES, pas un repli d'erreur.
+        cls.test_partner = cls.env['res.partner'].create({
+            'name': 'Test Supplier',
+            'supplier_rank': 1,
+            'is_company': True,
+        })
+        # Recherchés une fois pour la classe ; vérifiés dans le test
+        cls.journal = cls.env['account.journal'].search(
+            [('type', '=', 'purchase')], limit=1)
+        cls.account = cls.env['account.account'].search(
+            [('account_type', '=', 'expense')], limit=1)
+
+    def _make_posted_invoice(self):
+        """Créer et comptabiliser une facture fournisseur de test.
+
+        Volontairement SANS try/except : si la comptabilité de la base de test
+        est inutilisable, ce test doit ÉCHOUER bruyamment. L'ancienne version
+        enveloppait tout dans un `except Exception: skipTest`, ce qui
+        transformait n'importe quel échec — y compris celui de l'assertion —
+        en test ignoré.
+        """
+        self.assertTrue(self.journal, "Base de test sans journal d'achats")
+        self.assertTrue(self.account, "Base de test sans compte de charge")
+
+        invoice = self.env['account.move'].create({
+            'move_type': 'in_invoice',
+            'partner_id': self.test_partner.id,
+            'journal_id': self.journal.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [(0, 0, {
+                'name': 'Ligne de test',
+                'quantity': 1,
+                'price_unit': 1000,
+                'account_id': self.account.id,
+            })],
+        })
+        invoice.action_post()
+        self.assertEqual(invoice.state, 'posted')
+        return invoice
+
+    def test_cannot_delete_scan_with_posted_invoice(self):
+        """Un scan justifiant une facture COMPTABILISÉE ne peut être supprimé.
+
+        Axe distinct de l'état « traité » : le scan ci-dessous est en `done`,
+        donc non protégé à ce titre — c'est bien la facture comptabilisée qui
+        déclenche le refus.
+        """
+        invoice = self._make_posted_invoice()
+        record = self.env['invoice.scan.record'].create({
+            'qr_uuid': self.valid_uuid,
+            'qr_url': self.valid_url,
+            'invoice_id': invoice.id,
+            'state': 'done',
+        })
+
+        with self.assertRaises(UserError):
+            record.unlink()
+
+        self.assertTrue(record.exists())
+
+
+@tagged('post_install', '-at_install', 'invoice_qr_scanner', 'slow')
+class TestCreateInvoicesBatch(ScannerTestMixin, TransactionCase):
+    """Création groupée des factures (`_create_invoices_batch`).
+
+    Marquée `slow` comme `TestScanRecordPostedInvoice` : les factures sont
+    validées (paramètre `auto_validate_invoice`, actif par défaut).
+    """
+
+    def _make_scans(self, count, **vals):
+        return self.env['invoice.scan.record'].create([
+            dict({
+                'qr_uuid': '019bd62c-467e-7000-82ac-%012d' % i,
+                'qr_url': DGI_URL_TMPL.format('019bd62c-467e-7000-82ac-%012d' % i),
+                'supplier_name': 'Fournisseur Lot',
+                'supplier_code_dgi': 'LOT001K',
+                'invoice_number_dgi': 'FNE-LOT-%d' % i,
+                'amount_ttc': 1180,
+            }, **vals)
+            for i in range(count)
+        ])
+
+    def test_same_supplier_resolved_once_and_failure_isolated(self):
+        """Deux scans d'un même fournisseur, la facture du second en échec.
+
+        Le fournisseur, le journal et le compte de dépense ne sont résolus
+        que pour le premier scan ; le second les reçoit de l'appelant.
+        L'échec, isolé dans son savepoint, n'annule pas la première facture.
+        """
+        ok_scan, failing_scan = scans = self._make_scans(2)
+        ScanRecord = type(scans)
+        AccountMove = type(self.env['account.move'])
+        original_create = AccountMove.create
+
+        def _create(moves, vals_list):
+            batch = vals_list if isinstance(vals_list, list) else [vals_list]
+            if any(vals.get('ref') == failing_scan.invoice_number_dgi for vals in batch):
+                raise UserError("Journal verrouillé")
+            return original_create(moves, vals_list)
+
+        spies = {
+            name: patch.object(ScanRecord, name, autospec=True, side_effect=getattr(ScanRecord, name))
+            for name in ('_get_or_create_supplier', '_get_or_create_purchase_journal',
+                         '_get_or_create_expense_account')
+        }
+        with patch.object(AccountMove, 'create', _create), \
+                spies['_get_or_create_supplier'] as supplier_lookup, \
+                spies['_get_or_create_purchase_journal'] as journal_lookup, \
+                spies['_get_or_create_expense_account'] as account_lookup:
+            results = scans._create_invoices_batch()
+
+        self.assertEqual(results[ok_scan.id], ok_scan.invoice_id)
+        self.assertTrue(ok_scan.invoice_id)
+        self.assertIsInstance(results[failing_scan.id], UserError)
+        self.assertFalse(failing_scan.invoice_id)
+        self.assertEqual(
+            self.env['res.partner'].search_count([('dgi_code', '=', 'LOT001K')]), 1)
+        self.assertEqual(supplier_lookup.call_count, 1)
+        self.assertEqual(journal_lookup.call_count, 1)
+        self.assertEqual(account_lookup.call_count, 1)
+
+
+@tagged('post_install', '-at_install', 'invoice_qr_scanner')
+class TestDashboardData(ScannerTestMixin, TransactionCase):
+    """Tests pour les données du tableau de bord."""
+
+    def setUp(self):
+        super().setUp()
+        # Les dashboards sont mis en cache par worker : le rollback d'un test
+        # précédent ne passe pas par `write`, une entrée pourrait survivre.
+        response_cache.invalidate_company(self.env.cr.dbname, self.env.company.id)
+
+    def test_get_dashboard_data_read_only_variants(self):
+        """Dashboard sans données, pour chaque période : zéros LÉGITIMES.
 
         `assertFalse(data['error'])` est ici l'assertion essentielle : le
         `except` de `get_dashboard_data` renvoie une structure de même forme,
-        avec les mêmes clés et les mêmes zéros. Sans ce contrôle, ce test
-        passait au vert alors que la méthode plantait intégralement — ce qui
-        s'est effectivement produit pendant longtemps.
-        """
-        data = self.env['invoice.scan.record'].get_dashboard_data()
+        avec les mêmes clés et les mêmes zéros, et l'argument `period` reçu.
+        Sans ce contrôle, ces vérifications passaient au vert alors que la
+        méthode plantait intégralement — ce qui s'est effectivement produit
+        pendant longtemps.
 
-        self.assertFalse(data['error'], "Le calcul ne doit pas être en échec")
-        self.assertIn('stats', data)
-        self.assertIn('recent_scans', data)
-        self.assertIn('chart_data', data)
-        self.assertEqual(data['stats']['totalScans'], 0)
+        Une période invalide retombe sur 'month', et le fait savoir. Aucune
+        écriture : les variantes partagent une seule transaction de test.
+        """
+        ScanRecord = self.env['invoice.scan.record']
+        for period, expected in [(None, 'month'), ('invalid', 'month'), ('day', 'day'),
+                                 ('week', 'week'), ('month', 'month'), ('year', 'year')]:
+            data = ScanRecord.get_dashboard_data() if period is None \
+                else ScanRecord.get_dashboard_data(period)
+            self.assertFalse(data['error'],
+                             "Période '%s' : calcul en échec" % period)
+            self.assertEqual(data['period'], expected,
+                             "Période '%s' : mauvaise période renvoyée" % period)
+            self.assertIn('stats', data)
+            self.assertIn('recent_scans', data)
+            self.assertIn('chart_data', data)
+            self.assertEqual(data['stats']['totalScans'], 0)
 
     def test_get_dashboard_data_reports_failure(self):
         """Un calcul en échec est SIGNALÉ, il ne se déguise pas en zéros.
@@ -447,8 +569,11 @@ class TestDashboardData(TransactionCase):
         """
         ScanRecord = self.env['invoice.scan.record']
 
+        # Le repli journalise l'exception en ERROR, ce que le lanceur de tests
+        # Odoo compte comme un échec : l'erreur est ici attendue.
         with patch.object(type(ScanRecord), 'search_count',
-                          side_effect=RuntimeError('panne simulée')):
+                          side_effect=RuntimeError('panne simulée')), \
+                mute_logger('odoo.addons.invoice_qr_scanner.models.invoice_scan_record'):
             data = ScanRecord.get_dashboard_data('week')
 
         self.assertTrue(data['error'],
@@ -458,14 +583,14 @@ class TestDashboardData(TransactionCase):
 
     def test_get_dashboard_data_with_records(self):
         """Test du dashboard avec des enregistrements."""
-        # Créer quelques enregistrements
-        for i in range(5):
-            self.env['invoice.scan.record'].create({
-                'qr_uuid': f'019bd62c-467e-7000-82ac-45c8389c7f{i:02d}',
-                'qr_url': f'https://www.services.fne.dgi.gouv.ci/fr/verification/019bd62c-467e-7000-82ac-45c8389c7f{i:02d}',
-                'state': 'done' if i < 3 else 'error',
-                'amount_ttc': 10000 * (i + 1),
-            })
+        # Créer quelques enregistrements (en un seul `create` groupé)
+        uuids = [f'019bd62c-467e-7000-82ac-45c8389c7f{i:02d}' for i in range(5)]
+        self.env['invoice.scan.record'].create([{
+            'qr_uuid': uuid,
+            'qr_url': DGI_URL_TMPL.format(uuid),
+            'state': 'done' if i < 3 else 'error',
+            'amount_ttc': 10000 * (i + 1),
+        } for i, uuid in enumerate(uuids)])
         
         data = self.env['invoice.scan.record'].get_dashboard_data()
 
@@ -475,28 +600,82 @@ class TestDashboardData(TransactionCase):
         self.assertEqual(data['stats']['errorScans'], 2)
         self.assertGreater(len(data['recent_scans']), 0)
 
-    def test_get_dashboard_data_periods(self):
-        """Chaque période est acceptée et renvoyée telle quelle.
+    def _count_dashboard_queries(self):
+        """Nombre de requêtes SQL d'un calcul de dashboard à froid (hors cache)."""
+        response_cache.invalidate_company(self.env.cr.dbname, self.env.company.id)
+        self.env.flush_all()
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        data = self.env['invoice.scan.record'].get_dashboard_data()
+        self.assertFalse(data['error'])
+        return self.env.cr.sql_log_count - before
 
-        `assertFalse(data['error'])` est indispensable : le repli d'erreur
-        renvoie l'argument `period` reçu, donc l'égalité sur `period` seule
-        était satisfaite même quand la méthode plantait de bout en bout.
+    def test_get_dashboard_data_query_count_is_constant(self):
+        """Le nombre de requêtes ne croît pas avec le nombre de scans.
+
+        Garde-fou déterministe (pas de mesure de temps) : statistiques et
+        graphique sont agrégés en SQL. Une boucle par scan ou par jour qui
+        réapparaîtrait ferait grossir le second compte.
         """
-        for period in ['day', 'week', 'month', 'year']:
-            data = self.env['invoice.scan.record'].get_dashboard_data(period)
-            self.assertFalse(data['error'],
-                             "Période '%s' : calcul en échec" % period)
-            self.assertEqual(data['period'], period)
+        def make_scans(start, count):
+            uuids = [f'019bd62c-467e-7000-82ac-45c8389c{i:04x}'
+                     for i in range(start, start + count)]
+            self.env['invoice.scan.record'].create([{
+                'qr_uuid': uuid,
+                'qr_url': DGI_URL_TMPL.format(uuid),
+                'state': 'done',
+                'amount_ttc': 1000,
+            } for uuid in uuids])
+
+        make_scans(0, 2)
+        # Premier appel : remplit les caches du registre (règles, droits)
+        self._count_dashboard_queries()
+        few = self._count_dashboard_queries()
+        make_scans(2, 20)
+        many = self._count_dashboard_queries()
+
+        self.assertEqual(many, few,
+                         "Le dashboard doit rester en nombre de requêtes constant")
+
+    def test_get_dashboard_data_cache_invalidated_by_scan(self):
+        """Le dashboard en cache est resservi, puis invalidé par un nouveau scan.
+
+        Jusqu'au commit, la transaction qui a écrit ignore le cache et voit
+        ses propres scans ; l'invalidation elle-même a lieu après commit
+        (callbacks `postcommit`, que les tests exécutent à la main).
+        """
+        ScanRecord = self.env['invoice.scan.record']
+        self.assertEqual(ScanRecord.get_dashboard_data()['stats']['totalScans'], 0)
+
+        with patch.object(type(ScanRecord), 'search_count',
+                          side_effect=RuntimeError('ne doit pas être appelé')):
+            data = ScanRecord.get_dashboard_data()
+        self.assertFalse(data['error'], "Le second appel doit venir du cache")
+
+        uuid = '019bd62c-467e-7000-82ac-45c8389c7fff'
+        ScanRecord.create({
+            'qr_uuid': uuid,
+            'qr_url': DGI_URL_TMPL.format(uuid),
+            'state': 'done',
+        })
+        self.assertEqual(ScanRecord.get_dashboard_data()['stats']['totalScans'], 1)
 
-    def test_get_dashboard_data_invalid_period(self):
-        """Une période invalide retombe sur 'month', et le fait savoir.
+        self.env.cr.postcommit.run()
+        self.assertEqual(ScanRecord.get_dashboard_data()['stats']['totalScans'], 1)
+        with patch.object(type(ScanRecord), 'search_count',
+                          side_effect=RuntimeError('ne doit pas être appelé')):
+            data = ScanRecord.get_dashboard_data()
+        self.assertEqual(data['stats']['totalScans'], 1, "Après commit, le cache resert")
 
-        L'ancien test se contentait de `assertIn('stats', data)` — vrai dans
-        les deux branches, et muet sur la normalisation qu'il prétendait
-        vérifier.
-        """
-        data = self.env['invoice.scan.record'].get_dashboard_data('invalid')
+    def test_get_dashboard_data_cache_is_per_timezone(self):
+        """Dates et jours du résultat sont locaux : un fuseau, une entrée."""
+        ScanRecord = self.env['invoice.scan.record']
+        self.assertFalse(
+            ScanRecord.with_context(tz='Africa/Abidjan').get_dashboard_data()['error'])
 
-        self.assertFalse(data['error'])
-        self.assertEqual(data['period'], 'month',
-                         "Une période invalide doit être ramenée à 'month'")
+        with patch.object(type(ScanRecord), 'search_count',
+                          side_effect=RuntimeError('calcul attendu')), \
+                mute_logger('odoo.addons.invoice_qr_scanner.models.invoice_scan_record'):
+            data = ScanRecord.with_context(tz='Asia/Tokyo').get_dashboard_data()
+
+        self.assertTrue(data['error'], "Un autre fuseau ne doit pas lire l'entrée en cache")
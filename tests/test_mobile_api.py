@@ -3,19 +3,43 @@
 Tests unitaires pour l'API mobile REST
 """
 
+import hashlib
 import json
+import secrets
+import uuid
 from unittest.mock import patch
-from datetime import timedelta
+from datetime import date, timedelta
 
 from odoo import fields
 from odoo.exceptions import UserError
+from odoo.sql_db import TestCursor
 from odoo.tests import HttpCase, tagged
+from odoo.tools import mute_logger
 
-from odoo.addons.invoice_qr_scanner.controllers import mobile_api
+from odoo.addons.invoice_qr_scanner.controllers import mobile_api, token_cache
+from odoo.addons.invoice_qr_scanner.models import response_cache
+from odoo.addons.invoice_qr_scanner.tests.common import DGI_URL_TMPL, ScannerTestMixin
+
+
+class ApiRequestMixin:
+    """Requêtes JSON vers l'API, partagées par les classes de tests HTTP."""
+
+    def _make_request(self, url, method='POST', data=None, headers=None):
+        """Helper pour faire des requêtes HTTP."""
+        if headers is None:
+            headers = {'Content-Type': 'application/json'}
+        
+        if data is not None:
+            data = json.dumps(data)
+        
+        if method == 'POST':
+            return self.url_open(url, data=data, headers=headers)
+        else:
+            return self.url_open(url, headers=headers)
 
 
 @tagged('post_install', '-at_install', 'invoice_qr_scanner', 'api')
-class TestMobileAPI(HttpCase):
+class TestMobileAPI(ScannerTestMixin, ApiRequestMixin, HttpCase):
     """Tests pour l'API REST mobile."""
 
     @classmethod
@@ -37,22 +61,6 @@ class TestMobileAPI(HttpCase):
             'email': 'api_test@example.com',
             'groups_id': [(6, 0, groups)],
         })
-        
-        cls.valid_uuid = '019bd62c-467e-7000-82ac-45c8389c7f05'
-        cls.valid_url = f'https://www.services.fne.dgi.gouv.ci/fr/verification/{cls.valid_uuid}'
-
-    def _make_request(self, url, method='POST', data=None, headers=None):
-        """Helper pour faire des requêtes HTTP."""
-        if headers is None:
-            headers = {'Content-Type': 'application/json'}
-        
-        if data is not None:
-            data = json.dumps(data)
-        
-        if method == 'POST':
-            return self.url_open(url, data=data, headers=headers)
-        else:
-            return self.url_open(url, headers=headers)
 
     def test_health_check(self):
         """Test de l'endpoint de santé."""
@@ -329,10 +337,12 @@ class TestMobileAPI(HttpCase):
                 self.assertEqual(allowed.status_code, 200,
                                  "Requête %s du quota refusée à tort" % i)
 
-            response = self._make_request(
-                '/api/v1/invoice-scanner/auth/request-otp',
-                data={'login': self.test_user.login}
-            )
+            # Refus attendu : le contrôleur journalise le dépassement en warning
+            with mute_logger('odoo.addons.invoice_qr_scanner.controllers.mobile_api'):
+                response = self._make_request(
+                    '/api/v1/invoice-scanner/auth/request-otp',
+                    data={'login': self.test_user.login}
+                )
 
         self.assertEqual(response.status_code, 429)
         data = json.loads(response.content)
@@ -392,7 +402,7 @@ class TestMobileAPI(HttpCase):
 
 
 @tagged('post_install', '-at_install', 'invoice_qr_scanner', 'api')
-class TestAPIHelpers(HttpCase):
+class TestAPIHelpers(ApiRequestMixin, HttpCase):
     """Tests pour les fonctions helper de l'API."""
 
     def test_api_response_format(self):
@@ -425,15 +435,517 @@ class TestAPIHelpers(HttpCase):
         self.assertIn('code', data['error'])
         self.assertIn('message', data['error'])
 
-    def _make_request(self, url, method='POST', data=None, headers=None):
-        """Helper pour faire des requêtes HTTP."""
-        if headers is None:
-            headers = {'Content-Type': 'application/json'}
-        
-        if data is not None:
-            data = json.dumps(data)
-        
-        return self.url_open(url, data=data, headers=headers)
+    def test_response_cache_invalidation(self):
+        """Le cache de lecture est invalidé par société, pas globalement."""
+        dbname = self.env.cr.dbname
+        company_id = self.env.company.id
+        other_company_id = company_id + 100000
+        response_cache.set_cached(dbname, 'stats', company_id, 1, {'total_scans': 3}, 60)
+        response_cache.set_cached(dbname, 'stats', other_company_id, 1, {'total_scans': 7}, 60)
+        self.assertEqual(response_cache.get_cached(dbname, 'stats', company_id, 1), {'total_scans': 3})
+
+        response_cache.invalidate_company(dbname, company_id)
+
+        self.assertIsNone(response_cache.get_cached(dbname, 'stats', company_id, 1))
+        self.assertEqual(
+            response_cache.get_cached(dbname, 'stats', other_company_id, 1), {'total_scans': 7})
+        response_cache.invalidate_company(dbname, other_company_id)
+
+    def test_response_cache_is_scoped_to_database(self):
+        """Mêmes ids de société et d'utilisateur, autre base : pas de partage."""
+        dbname = self.env.cr.dbname
+        other_dbname = dbname + '_other'
+        company_id = self.env.company.id
+        response_cache.set_cached(dbname, 'stats', company_id, 2, {'total_scans': 3}, 60)
+
+        self.assertIsNone(response_cache.get_cached(other_dbname, 'stats', company_id, 2))
+        response_cache.set_cached(other_dbname, 'stats', company_id, 2, {'total_scans': 7}, 60)
+        response_cache.invalidate_company(other_dbname, company_id)
+
+        self.assertEqual(response_cache.get_cached(dbname, 'stats', company_id, 2), {'total_scans': 3})
+        self.assertIsNone(response_cache.get_cached(other_dbname, 'stats', company_id, 2))
+        response_cache.invalidate_company(dbname, company_id)
+
+    def test_parse_amount(self):
+        """Montants JSON ou texte, séparateurs de milliers fr-FR compris."""
+        self.assertEqual(mobile_api.parse_amount(1677566), 1677566.0)
+        self.assertEqual(mobile_api.parse_amount('1 677 566'), 1677566.0)
+        self.assertEqual(mobile_api.parse_amount('1 677 566.5'), 1677566.5)
+        for invalid in ('12 CFA', '', True):
+            with self.assertRaises(ValueError):
+                mobile_api.parse_amount(invalid)
+
+    def test_parse_invoice_date(self):
+        """Dates de facture JJ/MM/AAAA ou ISO ; None si invalide."""
+        expected = date(2026, 1, 15)
+        self.assertEqual(mobile_api.parse_invoice_date('15/01/2026'), expected)
+        self.assertEqual(mobile_api.parse_invoice_date('2026-01-15'), expected)
+        for invalid in ('31/02/2026', '15-01-2026', 'hier'):
+            self.assertIsNone(mobile_api.parse_invoice_date(invalid))
+
+
+@tagged('post_install', '-at_install', 'invoice_qr_scanner', 'api')
+class TestAuthenticatedAPI(ScannerTestMixin, ApiRequestMixin, HttpCase):
+    """Endpoints authentifiés, appelés avec un token Bearer.
+
+    Le token est émis directement en base (hash SHA-256, comme
+    `verify-otp`) : ces tests portent sur les endpoints, pas sur l'OTP.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.api_user = cls.env['res.users'].create({
+            'name': 'API Traiteur',
+            'login': 'api_traiteur_user',
+            'email': 'api_traiteur@example.com',
+            'groups_id': [(6, 0, [
+                cls.env.ref('base.group_user').id,
+                cls.env.ref('invoice_qr_scanner.group_invoice_scanner_user').id,
+                cls.env.ref('invoice_qr_scanner.group_invoice_scanner_traiteur').id,
+            ])],
+        })
+        cls.token = cls._issue_token(cls.api_user)
+
+    @classmethod
+    def _issue_token(cls, user, expires_at=None):
+        """Créer un token d'API pour `user` et retourner sa valeur en clair."""
+        token = secrets.token_urlsafe(32)
+        cls.env['invoice.scanner.api.token'].sudo().create({
+            'user_id': user.id,
+            'token_hash': hashlib.sha256(token.encode()).hexdigest(),
+            'expires_at': expires_at or fields.Datetime.now() + timedelta(days=1),
+        })
+        return token
+
+    def setUp(self):
+        super().setUp()
+        # Le cache de réponses est propre au processus : il survit au
+        # rollback entre deux tests, alors que les scans, eux, disparaissent.
+        response_cache.invalidate_company(self.env.cr.dbname, self.env.company.id)
+
+    def _api(self, path, data=None, method='GET', headers=None, token=None):
+        """Appeler `/api/v1/invoice-scanner/<path>` avec le token Bearer."""
+        headers = {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer %s' % (token or self.token),
+            **(headers or {}),
+        }
+        return self._make_request(
+            '/api/v1/invoice-scanner/%s' % path, method=method, data=data, headers=headers)
+
+    def _create_scans(self, count, **vals):
+        """Créer `count` scans de la société courante."""
+        return self.env['invoice.scan.record'].create([
+            dict({
+                'qr_uuid': str(uuid.uuid4()),
+                'qr_url': DGI_URL_TMPL.format(uuid.uuid4()),
+                'supplier_name': 'Fournisseur %d' % i,
+                'amount_ttc': 1000 * (i + 1),
+                'scanned_by': self.api_user.id,
+            }, **vals)
+            for i in range(count)
+        ])
+
+    def test_large_response_gzipped_only_when_accepted(self):
+        """Au-delà de GZIP_MIN_SIZE, gzip seulement si le client l'accepte.
+
+        `gzip;q=0` est un refus explicite (RFC 9110) : une simple recherche
+        de sous-chaîne le prenait pour une acceptation.
+        """
+        self._create_scans(5)
+
+        for accept, compressed in (('gzip', True), ('gzip;q=0', False), ('identity', False)):
+            with self.subTest(accept_encoding=accept):
+                response = self._api('history', headers={'Accept-Encoding': accept})
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers.get('Content-Encoding') == 'gzip', compressed)
+                self.assertIn('Accept-Encoding', response.headers.get('Vary', ''))
+                # `requests` décompresse : le contenu reste le même JSON.
+                self.assertEqual(len(json.loads(response.content)['data']['records']), 5)
+
+    def test_small_response_not_gzipped(self):
+        """Une petite réponse n'est pas compressée, mais porte `Vary`."""
+        response = self.url_open(
+            '/api/v1/invoice-scanner/health', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers.get('Vary', ''))
+
+    def test_errors_fields_id_only(self):
+        """`fields=id` ne renvoie que les ids (et ne lit pas tous les champs)."""
+        scans = self._create_scans(2, state='error', error_message='Erreur DGI')
+        ScanRecord = type(self.env['invoice.scan.record'])
+        read_calls = []
+        original_read = ScanRecord.read
+
+        def _spy_read(records, fields=None, load='_classic_read'):
+            read_calls.append(fields)
+            return original_read(records, fields, load)
+
+        with patch.object(ScanRecord, 'read', _spy_read):
+            response = self._api('errors?fields=id')
+
+        self.assertEqual(response.status_code, 200)
+        errors = json.loads(response.content)['data']['errors']
+        self.assertEqual(sorted(errors, key=lambda e: e['id']), [{'id': i} for i in sorted(scans.ids)])
+        self.assertNotIn([], read_calls)
+
+    def test_errors_unknown_fields_are_ignored(self):
+        """Clés inconnues ignorées ; si aucune n'est valide, toutes les clés."""
+        self._create_scans(1, state='error', error_message='Erreur DGI')
+
+        response = self._api('errors?fields=bogus')
+        self.assertEqual(response.status_code, 200)
+        [error] = json.loads(response.content)['data']['errors']
+        self.assertEqual(set(error), set(mobile_api.ERROR_API_FIELDS))
+
+        response = self._api('errors?fields=id,bogus,reference')
+        [error] = json.loads(response.content)['data']['errors']
+        self.assertEqual(set(error), {'id', 'reference'})
+
+    def _token_hash(self, token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def test_cached_token_is_accepted(self):
+        """Un token validé est mémorisé pour sa base de données, et elle seule."""
+        dbname = self.env.cr.dbname
+        token = self._issue_token(self.api_user)
+        token_hash = self._token_hash(token)
+        self.assertEqual(self._api('stats', token=token).status_code, 200)
+
+        now = fields.Datetime.now()
+        self.assertEqual(token_cache.get_cached_token(dbname, token_hash, now), self.api_user.id)
+        self.assertIsNone(token_cache.get_cached_token(dbname + '_other', token_hash, now))
+        token_cache.invalidate_token(dbname, token_hash)
+
+    def test_token_cached_for_another_database_is_ignored(self):
+        """Une entrée mise en cache par une autre base n'authentifie pas ici.
+
+        Sans la base dans la clé, le `user_id` mémorisé serait appliqué à
+        l'utilisateur portant le même id dans cette base.
+        """
+        token = secrets.token_urlsafe(32)
+        token_hash = self._token_hash(token)
+        token_cache.cache_token(
+            self.env.cr.dbname + '_other', token_hash, self.api_user.id,
+            fields.Datetime.now() + timedelta(days=1))
+
+        response = self._api('stats', token=token)
+
+        self.assertEqual(response.status_code, 401)
+        token_cache.invalidate_token(self.env.cr.dbname + '_other', token_hash)
+
+    def test_expired_cached_token_is_rejected(self):
+        """Une entrée en cache n'outrepasse pas l'expiration du token."""
+        expired_at = fields.Datetime.now() - timedelta(seconds=1)
+        token = self._issue_token(self.api_user, expires_at=expired_at)
+        token_hash = self._token_hash(token)
+        token_cache.cache_token(self.env.cr.dbname, token_hash, self.api_user.id, expired_at)
+
+        response = self._api('stats', token=token)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content)['error']['code'], 'AUTH_INVALID')
+        self.assertIsNone(
+            token_cache.get_cached_token(self.env.cr.dbname, token_hash, fields.Datetime.now()))
+
+    def test_cached_token_of_archived_user_is_rejected(self):
+        """Archiver l'utilisateur coupe l'accès, même token en cache."""
+        user = self.env['res.users'].create({
+            'name': 'API Archived User',
+            'login': 'api_archived_user',
+            'groups_id': [(6, 0, self.api_user.groups_id.ids)],
+        })
+        token = self._issue_token(user)
+        self.assertEqual(self._api('stats', token=token).status_code, 200)
+
+        user.active = False
+
+        self.assertEqual(self._api('stats', token=token).status_code, 401)
+        self.assertIsNone(
+            token_cache.get_cached_token(
+                self.env.cr.dbname, self._token_hash(token), fields.Datetime.now()))
+
+    def test_logout_evicts_cached_token(self):
+        """La déconnexion retire le token du cache du worker qui la traite."""
+        token = self._issue_token(self.api_user)
+        token_hash = self._token_hash(token)
+        self.assertEqual(self._api('stats', token=token).status_code, 200)
+
+        response = self._api('auth/logout', data={}, method='POST', token=token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(
+            token_cache.get_cached_token(self.env.cr.dbname, token_hash, fields.Datetime.now()))
+        self.assertEqual(self._api('stats', token=token).status_code, 401)
+
+    def _bulk_messages(self, records):
+        """Messages « marquage en masse » des scans, relus après la requête."""
+        self.env.invalidate_all()
+        return records.message_ids.filtered(lambda m: 'marquage en masse' in (m.body or ''))
+
+    def test_bulk_mark_processed_fast_path(self):
+        """Chemin groupé : une écriture, une note par scan."""
+        scans = self._create_scans(2, state='done')
+
+        response = self._api(
+            'bulk-mark-processed', data={'record_ids': scans.ids}, method='POST')
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)['data']
+        self.assertEqual(data['summary'], {'total_processed': 2, 'successful': 2, 'failed': 0})
+        self.assertEqual({r['record_id'] for r in data['results']}, set(scans.ids))
+        self.assertEqual(set(scans.mapped('state')), {'processed'})
+        messages = self._bulk_messages(scans)
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(set(messages.mapped('message_type')), {'notification'})
+        self.assertEqual(messages.subtype_id, self.env.ref('mail.mt_note'))
+
+    def test_bulk_mark_processed_fallback_logs_same_note(self):
+        """Repli ligne par ligne : même note dans le chatter qu'en groupé."""
+        scans = self._create_scans(2, state='done')
+
+        with patch.object(type(scans), '_message_log_batch', side_effect=Exception('boom')):
+            response = self._api(
+                'bulk-mark-processed', data={'record_ids': scans.ids}, method='POST')
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)['data']
+        self.assertEqual(data['summary'], {'total_processed': 2, 'successful': 2, 'failed': 0})
+        self.assertEqual(set(scans.mapped('state')), {'processed'})
+        messages = self._bulk_messages(scans)
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(set(messages.mapped('message_type')), {'notification'})
+        self.assertEqual(messages.subtype_id, self.env.ref('mail.mt_note'))
+
+    def test_bulk_mark_processed_not_verbose(self):
+        """`verbose=false` : résumé seul, sans détail par scan."""
+        scans = self._create_scans(3, state='done')
+
+        response = self._api(
+            'bulk-mark-processed',
+            data={'record_ids': scans.ids, 'verbose': False}, method='POST')
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)['data']
+        self.assertNotIn('results', data)
+        self.assertEqual(data['summary'], {'total_processed': 3, 'successful': 3, 'failed': 0})
+
+    def _assert_etag_revalidation(self, path, change):
+        """304 vide pour un ETag connu (fort ou faible), nouvel ETag après `change`."""
+        response = self._api(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+
+        for if_none_match in (etag, 'W/%s' % etag, '"other", %s' % etag):
+            with self.subTest(if_none_match=if_none_match):
+                response = self._api(path, headers={'If-None-Match': if_none_match})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response.headers['ETag'], etag)
+
+        change()
+        # Le cache de /stats est invalidé après commit : exécuter les
+        # callbacks du curseur de test, que rien ne valide.
+        self.env.cr.postcommit.run()
+
+        response = self._api(path, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_stats_etag_revalidation(self):
+        """/stats : 304 tant que les statistiques n'ont pas changé."""
+        self._create_scans(1, state='done')
+        self._assert_etag_revalidation('stats', lambda: self._create_scans(1, state='done'))
+
+    def test_errors_etag_revalidation(self):
+        """/errors : 304 tant qu'aucun scan n'entre ou ne sort de l'erreur."""
+        self._create_scans(1, state='error', error_message='Erreur DGI')
+        scan = self._create_scans(1, state='done')
+        self._assert_etag_revalidation(
+            'errors', lambda: scan.write({'state': 'error', 'error_message': 'Timeout'}))
+
+    def test_history_shows_scan_recorded_in_same_worker(self):
+        """Un scan enregistré par l'API apparaît au /history suivant.
+
+        /history est servi depuis le cache ; c'est le callback post-commit
+        de l'endpoint (`_invalidate_read_cache`) qui invalide la société.
+        `TestCursor.commit` ignore ces callbacks : on les exécute au commit,
+        comme en production, et on neutralise l'invalidation immédiate du
+        modèle pour n'éprouver que celle de l'endpoint.
+        """
+        self._create_scans(1)
+        first = json.loads(self._api('history').content)['data']
+        hits = response_cache.get_cache_status()['hits']
+        self.assertEqual(json.loads(self._api('history').content)['data'], first)
+        self.assertEqual(response_cache.get_cache_status()['hits'], hits + 1)
+
+        original_commit = TestCursor.commit
+
+        def _commit_running_postcommit(cr):
+            cr.flush()
+            cr.postcommit.run()
+            return original_commit(cr)
+
+        with patch.object(type(self.env['invoice.scan.record']), '_invalidate_dashboard_cache'), \
+                patch.object(TestCursor, 'commit', _commit_running_postcommit):
+            response = self._api('scan-with-data', method='POST', data={
+                'qr_url': self.valid_url,
+                'supplier_name': 'Fournisseur API',
+                'invoice_number_dgi': 'FNE-0001',
+                'amount_ttc': 1180,
+                'invoice_date': '15/01/2026',
+            })
+            self.assertEqual(response.status_code, 200)
+            record_id = json.loads(response.content)['data']['record']['id']
+
+            history = json.loads(self._api('history').content)['data']
+
+        self.assertEqual(history['pagination']['total_count'], 2)
+        # Même transaction, même `create_date` : l'ordre entre les deux
+        # scans n'est pas garanti.
+        self.assertIn(record_id, [r['id'] for r in history['records']])
+
+    def test_history_pagination(self):
+        """Total et page suivante : page pleine, dernière page courte, au-delà.
+
+        Une page incomplète est la dernière : son total se déduit sans
+        COUNT. Une page pleine ou vide (au-delà de la fin) en refait un.
+        """
+        self._create_scans(5)
+        ScanRecord = type(self.env['invoice.scan.record'])
+        cases = [
+            # (page, limit, nombre de lignes, has_next, COUNT exécuté)
+            (2, 2, 2, True, True),      # page pleine
+            (1, 5, 5, False, True),     # page pleine, et pourtant la dernière
+            (3, 2, 1, False, False),    # dernière page courte
+            (4, 2, 0, False, True),     # au-delà de la fin
+        ]
+        for page, limit, count, has_next, counted in cases:
+            with self.subTest(page=page, limit=limit):
+                with patch.object(ScanRecord, 'search_count', autospec=True,
+                                  side_effect=ScanRecord.search_count) as search_count:
+                    response = self._api('history?page=%d&limit=%d' % (page, limit))
+
+                data = json.loads(response.content)['data']
+                self.assertEqual(len(data['records']), count)
+                self.assertEqual(data['pagination']['total_count'], 5)
+                self.assertEqual(data['pagination']['total_pages'], (5 + limit - 1) // limit)
+                self.assertEqual(data['pagination']['has_next'], has_next)
+                self.assertEqual(data['pagination']['has_previous'], page > 1)
+                self.assertEqual(search_count.called, counted)
+
+    def _parsed_scan(self, qr_uuid=None, amount_ttc=1180, **parsed):
+        """Entrée de lot sync-parsed, données DGI pré-extraites."""
+        return {
+            'qr_url': DGI_URL_TMPL.format(qr_uuid or uuid.uuid4()),
+            'scanned_at': '2026-01-15T10:00:00',
+            'parsed_data': dict({
+                'supplier_name': 'Fournisseur Sync',
+                'supplier_code_dgi': 'SYNC001K',
+                'invoice_number_dgi': 'FNE-%s' % secrets.token_hex(4),
+                'invoice_date': '15/01/2026',
+                'amount_ttc': amount_ttc,
+            }, **parsed),
+        }
+
+    def _sync_parsed(self, scans):
+        response = self._api('sync-parsed', method='POST', data={'scans': scans})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)['data']
+
+    def test_sync_parsed_duplicate_of_existing_scan(self):
+        """Un QR déjà scanné avec succès est signalé comme doublon."""
+        existing = self._create_scans(1, state='done')
+
+        data = self._sync_parsed([self._parsed_scan(existing.qr_uuid)])
+
+        [result] = data['results']
+        self.assertEqual(result['error_code'], 'DUPLICATE')
+        self.assertEqual(result['duplicate_count'], 1)
+        self.assertEqual(data['summary'], {'total': 1, 'successful': 0, 'duplicates': 1, 'errors': 0})
+        self.assertEqual(existing.duplicate_count, 1)
+
+    def test_sync_parsed_same_qr_twice_in_batch(self):
+        """Même QR deux fois dans le lot : facturé une fois, puis doublon."""
+        scan = self._parsed_scan()
+
+        data = self._sync_parsed([scan, dict(scan)])
+
+        first, second = data['results']
+        self.assertTrue(first['success'])
+        self.assertTrue(first['invoice_id'])
+        self.assertEqual(second['error_code'], 'DUPLICATE')
+        self.assertEqual(second['duplicate_count'], 1)
+        record = self.env['invoice.scan.record'].browse(first['record_id'])
+        self.assertEqual(record.invoice_id.id, first['invoice_id'])
+        self.assertEqual(record.duplicate_count, 1)
+
+    def test_sync_parsed_reuses_error_record(self):
+        """Un scan en erreur est repris (même enregistrement), pas recréé."""
+        error_scan = self._create_scans(1, state='error', error_message='Timeout DGI')
+
+        data = self._sync_parsed([self._parsed_scan(error_scan.qr_uuid)])
+
+        [result] = data['results']
+        self.assertTrue(result['success'])
+        self.assertEqual(result['record_id'], error_scan.id)
+        self.assertEqual(error_scan.state, 'done')
+        self.assertFalse(error_scan.error_message)
+        self.assertEqual(error_scan.invoice_id.id, result['invoice_id'])
+        self.assertEqual(self.env['invoice.scan.record'].search_count(
+            [('qr_uuid', '=', error_scan.qr_uuid)]), 1)
+
+    def test_sync_parsed_invoice_failure_is_isolated(self):
+        """Une facture en échec passe son scan en erreur, sans toucher aux autres."""
+        scans = [
+            self._parsed_scan(),
+            self._parsed_scan(amount_ttc=0),   # refusé par `_create_invoice`
+            self._parsed_scan(),
+        ]
+
+        data = self._sync_parsed(scans)
+
+        ok_first, failed, ok_last = data['results']
+        self.assertTrue(ok_first['success'])
+        self.assertTrue(ok_last['success'])
+        self.assertFalse(failed['success'])
+        self.assertEqual(failed['error_code'], 'INVOICE_ERROR')
+        self.assertEqual(data['summary'], {'total': 3, 'successful': 2, 'duplicates': 0, 'errors': 1})
+        failed_record = self.env['invoice.scan.record'].search(
+            [('qr_url', '=', scans[1]['qr_url'])])
+        self.assertEqual(failed_record.state, 'error')
+        self.assertFalse(failed_record.invoice_id)
+        invoices = self.env['account.move'].browse([ok_first['invoice_id'], ok_last['invoice_id']])
+        self.assertEqual(len(invoices.exists()), 2)
+
+    def test_sync_parsed_results_follow_request_order(self):
+        """Un résultat par scan, dans l'ordre du lot, forme selon l'issue."""
+        existing = self._create_scans(1, state='done')
+        scans = [
+            self._parsed_scan(),
+            {'qr_url': '', 'parsed_data': {}},
+            {'qr_url': 'https://example.com/pas-un-qr', 'parsed_data': {}},
+            self._parsed_scan(existing.qr_uuid),
+            self._parsed_scan(supplier_name='', invoice_number_dgi=''),
+            self._parsed_scan(),
+        ]
+
+        data = self._sync_parsed(scans)
+
+        results = data['results']
+        self.assertEqual([r['qr_url'] for r in results], [s['qr_url'] for s in scans])
+        self.assertEqual(
+            [r.get('error_code') for r in results],
+            [None, None, 'INVALID_URL', 'DUPLICATE', 'INSUFFICIENT_DATA', None])
+        self.assertEqual(results[1]['error'], 'URL manquante')
+        for result in (results[0], results[5]):
+            self.assertTrue(result['success'])
+            self.assertTrue({'record_id', 'invoice_id', 'invoice_name', 'message'} <= set(result))
+        self.assertEqual(data['summary'], {'total': 6, 'successful': 2, 'duplicates': 1, 'errors': 3})
 
 
 # NOTE — La classe `TestAPIValidation` a été retirée le 2026-07-21.